@@ -1,20 +1,41 @@
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
+from array import array
+from bisect import bisect_right
 from collections import defaultdict
 from datetime import datetime, timezone
 
-from .utils import utcnow, parse_ts, exponential_decay_weight, detect_crypto_symbols
-from .sentiment import score_text
-from .indicators import generate_market_indicators
-
-SOURCE_WEIGHTS = {
-    "CoinDesk": 1.0,
-    "Reuters Markets": 1.0,
-    "CoinTelegraph": 0.8,
-    "Decrypt": 0.85,
-    "CryptoSlate": 0.75,
-    "CryptoPanic": 0.5,
+from .utils import utcnow, parse_ts, exponential_decay_weight
+from .symbols import detect_crypto_symbols, extract_crypto_symbols, universe_stamp, sync_universe
+from .parallel import should_parallelize, chunk_bounds, map_chunks
+from .registry import SOURCES
+from .seen import item_key
+from .series import history_series
+from .state import DecayedAccumulator, DecayedState, FULL_RECOMPUTE_EVERY, DRIFT_TOLERANCE, live_key
+from .sentiment import get_scorer
+from .streamstats import TDigest, TopK
+
+# Per-source weights come from the source registry (analyzer/registry.json)
+SOURCE_WEIGHTS = {spec.name: spec.weight for spec in SOURCES}
+DEFAULT_SOURCE_WEIGHT = 0.8
+
+# Look-back span of each published window, in hours
+WINDOWS: Dict[str, float] = {
+    "1h": 1.0,
+    "4h": 4.0,
+    "24h": 24.0,
+    "7d": 168.0,
 }
 
+DRIVERS_K = 3
+# Drivers kept per bucket and per source in drivers.by_bucket / by_source
+BREAKDOWN_K = 2
+# Published points of each bucket's weighted per-item score distribution
+QUANTILES = [("p10", 0.1), ("median", 0.5), ("p90", 0.9)]
+
+# Per-asset table layout; rows are positional to keep the feed compact
+ASSET_FIELDS = ["symbol", "sentiment", "confidence", "count", "weight", "top_positive", "top_negative"]
+MAX_ASSETS = 250
+
 
 def dedupe_items(items: List[Dict]) -> List[Dict]:
     seen = set()
@@ -28,79 +49,370 @@ def dedupe_items(items: List[Dict]) -> List[Dict]:
     return deduped
 
 
-def compute_item_weight(item: Dict, now: datetime) -> float:
+def item_age_hours(item: Dict, now: datetime) -> float:
     published_at = parse_ts(item["published_at"]) if isinstance(item.get("published_at"), str) else now
-    age_hours = max(0.0, (now - published_at).total_seconds() / 3600.0)
-    freshness = exponential_decay_weight(age_hours)
-    src_w = SOURCE_WEIGHTS.get(item.get("source"), 0.8)
-    symbol_bonus = 1.2 if detect_crypto_symbols(item.get("title", "")) else 1.0
-    return freshness * src_w * symbol_bonus
+    return max(0.0, (now - published_at).total_seconds() / 3600.0)
+
+
+def base_weight(source: Optional[str], title: str) -> float:
+    """Time-independent part of an item's weight: source weight and symbol bonus"""
+    src_w = SOURCE_WEIGHTS.get(source, DEFAULT_SOURCE_WEIGHT)
+    symbol_bonus = 1.2 if detect_crypto_symbols(title) else 1.0
+    return src_w * symbol_bonus
+
+
+def decayed_weight(age_hours: float, base: float) -> float:
+    return exponential_decay_weight(age_hours) * base
+
+
+def _weight(age_hours: float, source: Optional[str], title: str) -> float:
+    return decayed_weight(age_hours, base_weight(source, title))
+
+
+def compute_item_weight(item: Dict, now: datetime, age_hours: Optional[float] = None) -> float:
+    if age_hours is None:
+        age_hours = item_age_hours(item, now)
+    return _weight(age_hours, item.get("source"), item.get("title", ""))
+
+
+def score_items(
+    texts: List[str], titles: List[str], sources: List[Optional[str]], published: List[Optional[str]], now: datetime
+) -> Tuple[array, array, array]:
+    """Sentiment, weight and age for each item, as parallel float arrays"""
+    scores, weights, ages = array("d", get_scorer().score_batch(texts)), array("d"), array("d")
+    for title, source, pub in zip(titles, sources, published):
+        age = max(0.0, (now - parse_ts(pub)).total_seconds() / 3600.0) if pub is not None else 0.0
+        weights.append(_weight(age, source, title))
+        ages.append(age)
+    return scores, weights, ages
+
+
+def _score_chunk(args: Tuple) -> Tuple[array, array, array]:
+    *columns, now, stamp = args
+    sync_universe(stamp)
+    return score_items(*columns, now)
+
+
+def score_items_batch(items: List[Dict], now: datetime) -> Tuple[array, array, array]:
+    """score_items over dicts, fanned out to the worker pool for large batches.
+
+    Workers only receive the text/title/source/timestamp columns and return
+    float arrays; every item is computed by the same function in either mode,
+    so the output does not depend on which path ran.
+    """
+    texts = [(it.get("text") or it.get("title") or "") for it in items]
+    titles = [it.get("title", "") for it in items]
+    sources = [it.get("source") for it in items]
+    published = [it["published_at"] if isinstance(it.get("published_at"), str) else None for it in items]
+    if not should_parallelize(len(items)):
+        return score_items(texts, titles, sources, published, now)
+
+    stamp = universe_stamp()
+    chunks = [(texts[r.start:r.stop], titles[r.start:r.stop], sources[r.start:r.stop], published[r.start:r.stop], now, stamp)
+              for r in chunk_bounds(len(items))]
+    scores, weights, ages = array("d"), array("d"), array("d")
+    for s_part, w_part, a_part in map_chunks(_score_chunk, chunks):
+        scores.extend(s_part)
+        weights.extend(w_part)
+        ages.extend(a_part)
+    return scores, weights, ages
+
+
+def item_bucket(item: Dict) -> str:
+    cat = item.get("category")
+    # Map social into crypto bucket
+    return cat if cat in ("crypto", "global") else "crypto"
+
+
+def is_clear(s: float) -> bool:
+    # Only items with significant sentiment count (filter out neutral)
+    return abs(s) > 0.1
+
+
+def scored_items(items: List[Dict], now: datetime) -> List[Tuple[float, str, float, float, Dict]]:
+    """(age_hours, bucket, s, w, item) for every item with a clear sentiment"""
+    scores, weights, ages = score_items_batch(items, now)
+
+    scored = []
+    for it, s, w, age in zip(items, scores, weights, ages):
+        if is_clear(s):
+            scored.append((age, item_bucket(it), s, w, it))
+    return scored
+
+
+def _to_unit(s_weighted: float) -> float:
+    # Amplify the signal and make it more diverse
+    # Filter out neutral items and amplify the remaining sentiment
+    amplified = s_weighted * 2.0  # Double the impact
+    s01 = 0.5 + (amplified * 0.3)  # Spread from 0.2 to 0.8
+    return max(0.2, min(0.8, s01))  # Clamp to more diverse range
+
+
+def _bucket_stats(sw: float, sws: float, count: int, unique_sources: int) -> Tuple[float, float, float, int]:
+    if not count or sw == 0:
+        return 0.0, 0.0, 0.0, 0
+    s_weighted = sws / sw
+    s01 = _to_unit(s_weighted)
+    # confidence
+    k = 10.0
+    conf = (sw / (sw + k)) ** 0.5
+    diversity_scale = min(1.0, (unique_sources / 4.0) ** 0.5)
+    conf *= diversity_scale
+    return s_weighted, s01, conf, count
+
+
+def _driver(s: float, w: float, it: Dict) -> Dict:
+    return {"title": it.get("title"), "url": it.get("url"), "source": it.get("source"), "weight": round(w, 4), "score": round(s, 4)}
+
+
+def _quantiles(digest: TDigest) -> Optional[Dict]:
+    if not digest.total:
+        return None
+    # _to_unit is monotone, so quantiles of raw scores map onto the published 0..1 scale
+    return {name: round(_to_unit(digest.quantile(q)), 4) for name, q in QUANTILES}
+
 
+def compute_windows(scored: List[Tuple[float, str, float, float, Dict]], spans: Dict[str, float]) -> Dict[str, Dict]:
+    """Sentiment, confidence, score distribution and drivers for several windows in one pass.
 
-def aggregate(items: List[Dict], history: List[Dict]) -> Dict:
-    now = utcnow()
+    `scored` holds (age_hours, bucket, s, w, item) tuples. Sorted by age, every
+    window is a prefix of the same array, so running sums, t-digests and
+    bounded driver heaps are snapshotted at each window boundary instead of
+    re-scanning the items per window.
+    """
+    scored = sorted(scored, key=lambda e: e[0])
+    ages = [e[0] for e in scored]
+    boundaries = sorted((bisect_right(ages, hours), name) for name, hours in spans.items())
+
+    sums = {cat: [0.0, 0.0, 0] for cat in ("crypto", "global")}
+    sources = {cat: set() for cat in ("crypto", "global")}
+    digests = {cat: TDigest() for cat in ("crypto", "global")}
+    positive: TopK[Tuple[float, float, Dict]] = TopK(DRIVERS_K)
+    negative: TopK[Tuple[float, float, Dict]] = TopK(DRIVERS_K)
+
+    def snapshot() -> Dict:
+        c_raw, c01, c_conf, c_count = _bucket_stats(*sums["crypto"], len(sources["crypto"]))
+        g_raw, g01, g_conf, g_count = _bucket_stats(*sums["global"], len(sources["global"]))
+        combined_raw = 0.9 * c_raw + 0.1 * g_raw
+        return {
+            "crypto_sentiment": round(c01, 4),
+            "global_sentiment": round(g01, 4),
+            "combined_sentiment": round((combined_raw + 1.0) / 2.0, 4),
+            "confidence": round(c_conf * 0.9 + g_conf * 0.1, 4),
+            "counts": {"crypto": c_count, "global": g_count},
+            "distribution": {
+                "crypto": _quantiles(digests["crypto"]),
+                "global": _quantiles(digests["global"]),
+                "all": _quantiles(digests["crypto"].copy().merge(digests["global"])),
+            },
+            "drivers": {
+                "positive": [_driver(*e) for e in positive.items()],
+                "negative": [_driver(*e) for e in negative.items()],
+            },
+        }
+
+    out: Dict[str, Dict] = {}
+    b = 0
+    for i, (_, cat, s, w, it) in enumerate(scored):
+        while b < len(boundaries) and boundaries[b][0] == i:
+            out[boundaries[b][1]] = snapshot()
+            b += 1
+        acc = sums[cat]
+        acc[0] += w
+        acc[1] += s * w
+        acc[2] += 1
+        sources[cat].add(it.get("source"))
+        digests[cat].add(s, w)
+        # Drivers keyed by |s * w|; the index breaks ties in favour of fresher items
+        if s > 0:
+            positive.push((s * w, -i), (s, w, it))
+        elif s < 0:
+            negative.push((-s * w, -i), (s, w, it))
+    while b < len(boundaries):
+        out[boundaries[b][1]] = snapshot()
+        b += 1
+    return out
+
+
+def compute_driver_breakdown(scored: List[Tuple[float, str, float, float, Dict]], k: int = BREAKDOWN_K) -> Dict:
+    """Top-k positive/negative drivers per bucket and per source, in bounded memory"""
+    tops: Dict[Tuple[str, str], Tuple[TopK, TopK]] = {}
+    for i, (_, cat, s, w, it) in enumerate(sorted(scored, key=lambda e: e[0])):
+        if s == 0:
+            continue
+        for group in (("bucket", cat), ("source", it.get("source") or "unknown")):
+            pos, neg = tops.setdefault(group, (TopK(k), TopK(k)))
+            if s > 0:
+                pos.push((s * w, -i), (s, w, it))
+            else:
+                neg.push((-s * w, -i), (s, w, it))
+    out: Dict[str, Dict] = {"bucket": {}, "source": {}}
+    for (kind, name), (pos, neg) in sorted(tops.items()):
+        out[kind][name] = {
+            "positive": [_driver(*e) for e in pos.items()],
+            "negative": [_driver(*e) for e in neg.items()],
+        }
+    return {"by_bucket": out["bucket"], "by_source": out["source"]}
+
+
+def build_symbol_index(scored: List[Tuple[float, str, float, float, Dict]]) -> Dict[str, List[int]]:
+    """Inverted index from ticker to the positions of the scored items mentioning it"""
+    index: Dict[str, List[int]] = {}
+    for pos, (_, _, _, _, it) in enumerate(scored):
+        text = f"{it.get('title') or ''} {it.get('text') or ''}"
+        for sym in extract_crypto_symbols(text):
+            index.setdefault(sym, []).append(pos)
+    return index
+
+
+def compute_asset_table(scored: List[Tuple[float, str, float, float, Dict]], index: Dict[str, List[int]]) -> Dict:
+    """Decayed weighted sentiment, counts and top drivers per ticker"""
+    rows = []
+    for sym, postings in index.items():
+        sw = sws = 0.0
+        sources = set()
+        best_pos: Tuple[float, Optional[str]] = (0.0, None)
+        best_neg: Tuple[float, Optional[str]] = (0.0, None)
+        for pos in postings:
+            _, _, s, w, it = scored[pos]
+            impact = s * w
+            sw += w
+            sws += impact
+            sources.add(it.get("source"))
+            if impact > best_pos[0]:
+                best_pos = (impact, it.get("url"))
+            elif impact < best_neg[0]:
+                best_neg = (impact, it.get("url"))
+        _, s01, conf, count = _bucket_stats(sw, sws, len(postings), len(sources))
+        rows.append([sym, round(s01, 4), round(conf, 4), count, round(sw, 4), best_pos[1], best_neg[1]])
+    rows.sort(key=lambda r: (-r[4], r[0]))
+    return {"fields": ASSET_FIELDS, "rows": rows[:MAX_ASSETS]}
+
+
+def source_coverage(missing: Iterable[str], expected: Iterable[str]) -> float:
+    """Share of the expected source weight that made it into the run"""
+    total = sum(SOURCE_WEIGHTS.get(s, DEFAULT_SOURCE_WEIGHT) for s in expected)
+    lost = sum(SOURCE_WEIGHTS.get(s, DEFAULT_SOURCE_WEIGHT) for s in missing)
+    return max(0.0, 1.0 - lost / total) if total > 0 else 1.0
+
+
+def history_point(stats: Dict, now: datetime) -> Dict:
+    return {
+        "ts": now.isoformat(),
+        "crypto": stats["crypto_sentiment"],
+        "global": stats["global_sentiment"],
+        "combined": stats["combined_sentiment"],
+        "counts": dict(stats["counts"]),
+    }
+
+
+def update_decayed_state(
+    state: DecayedState, items: List[Dict], scored: List[Tuple[float, str, float, float, Dict]], now: datetime
+) -> Dict:
+    """Roll the persisted accumulators forward to `now` and fold in unseen items.
+
+    Every FULL_RECOMPUTE_EVERY runs the sums are rebuilt from the fetched items
+    and compared; drift above DRIFT_TOLERANCE replaces the rolled state.
+    """
+    state.advance(now)
+    # A snapshot's latest reading replaces its live slot (see seen.item_key)
+    snapshots = {live_key(it): it for it in items if it.get("snapshot")}
+    for key in snapshots:
+        state.drop_live(key)
+    # Neutral items are marked too, so they are not re-checked every run
+    new_keys = {id(it): key for it, key in ((it, item_key(it)) for it in items) if not it.get("snapshot") and state.is_new(key)}
+    for _, cat, s, w, it in scored:
+        if it.get("snapshot"):
+            if snapshots.get(live_key(it)) is it:
+                state.set_live(live_key(it), cat, it.get("source"), s, w)
+        elif id(it) in new_keys:
+            state.add(cat, it.get("source"), s, w)
+    for key in set(new_keys.values()):
+        state.mark_seen(key)
+
+    drift = None
+    state.runs_since_full += 1
+    if state.runs_since_full >= FULL_RECOMPUTE_EVERY:
+        full = DecayedState(as_of=now)
+        for _, cat, s, w, it in scored:
+            if not it.get("snapshot"):
+                full.add(cat, it.get("source"), s, w)
+        # Live contributions (snapshots, streamed updates) carry over as they are
+        for key, (cat, source, s, w) in state.live.items():
+            full.set_live(key, cat, source, s, w)
+        drift = max(
+            abs((full.buckets.get(cat) or DecayedAccumulator()).mean - (state.buckets.get(cat) or DecayedAccumulator()).mean)
+            for cat in ("crypto", "global")
+        )
+        if drift > DRIFT_TOLERANCE:
+            state.buckets, state.sources = full.buckets, full.sources
+        state.runs_since_full = 0
+    return decayed_summary(state, drift)
+
+
+def decayed_summary(state: DecayedState, drift: Optional[float] = None) -> Dict:
+    c_raw = (state.buckets.get("crypto") or DecayedAccumulator()).mean
+    g_raw = (state.buckets.get("global") or DecayedAccumulator()).mean
+    return {
+        "as_of": state.as_of.isoformat(),
+        "crypto_sentiment": round(_to_unit(c_raw), 4) if "crypto" in state.buckets else 0.0,
+        "global_sentiment": round(_to_unit(g_raw), 4) if "global" in state.buckets else 0.0,
+        "combined_sentiment": round((0.9 * c_raw + 0.1 * g_raw + 1.0) / 2.0, 4),
+        "weights": {cat: round(acc.sw, 4) for cat, acc in state.buckets.items()},
+        "sources": {
+            src: {"sentiment": round(acc.mean, 4), "weight": round(acc.sw, 4)}
+            for src, acc in sorted(state.sources.items())
+        },
+        "drift": round(drift, 4) if drift is not None else None,
+    }
+
+
+def aggregate(
+    items: List[Dict],
+    history: List[Dict],
+    windows: Optional[Iterable[str]] = None,
+    state: Optional[DecayedState] = None,
+    now: Optional[datetime] = None,
+    market_indicators: Optional[Dict] = None,
+    missing_sources: Optional[List[str]] = None,
+    expected_sources: Optional[List[str]] = None,
+    failed_sources: Optional[Dict[str, str]] = None,
+) -> Dict:
+    now = now or utcnow()
     items = dedupe_items(items)
 
     # Check if this is a daily recap run (19:45 UTC = 20:45 London time)
     is_daily_recap = now.hour == 19 and now.minute >= 45 and now.minute < 55  # Within 10 minutes of 19:45 UTC
     
-    # Generate comprehensive market indicators
-    market_indicators = generate_market_indicators()
+    # Market indicators are produced and cached separately (see indicators.get_market_indicators)
+    market_indicators = market_indicators or {}
 
-    buckets = {"crypto": [], "global": []}
-    for it in items:
-        # Use description text when available to enrich sentiment
-        s = score_text((it.get("text") or it.get("title") or ""))
-        w = compute_item_weight(it, now)
-        cat = it.get("category")
-        # Map social into crypto bucket
-        if cat not in ("crypto", "global"):
-            cat = "crypto"
-        # Only include items with significant sentiment (filter out neutral)
-        if abs(s) > 0.1:  # Only items with clear sentiment
-            buckets[cat].append((s, w, it))
-
-    def calc(b: List[Tuple[float, float, Dict]]) -> Tuple[float, float, float, int]:
-        if not b:
-            return 0.0, 0.0, 0.0, 0
-        sw = sum(w for _, w, _ in b)
-        if sw == 0:
-            return 0.0, 0.0, 0.0, 0
-        s_weighted = sum(s * w for s, w, _ in b) / sw
-        # Amplify the signal and make it more diverse
-        # Filter out neutral items and amplify the remaining sentiment
-        amplified = s_weighted * 2.0  # Double the impact
-        s01 = 0.5 + (amplified * 0.3)  # Spread from 0.2 to 0.8
-        s01 = max(0.2, min(0.8, s01))  # Clamp to more diverse range
-        # confidence
-        unique_sources = len({item.get("source") for _, _, item in b})
-        k = 10.0
-        conf = (sw / (sw + k)) ** 0.5
-        diversity_scale = min(1.0, (unique_sources / 4.0) ** 0.5)
-        conf *= diversity_scale
-        return s_weighted, s01, conf, len(b)
-
-    c_raw, c01, c_conf, c_count = calc(buckets["crypto"])
-    g_raw, g01, g_conf, g_count = calc(buckets["global"])
-
-    combined_raw = 0.9 * c_raw + 0.1 * g_raw
-    combined01 = (combined_raw + 1.0) / 2.0
-    combined_conf = (c_conf * 0.9 + g_conf * 0.1)
-
-    # Drivers: top positive/negative by s * w
-    scored = []
-    for cat, b in buckets.items():
-        for s, w, it in b:
-            scored.append((s * w, s, w, it))
-    scored.sort(key=lambda x: x[0], reverse=True)
-    positives = [
-        {"title": it.get("title"), "url": it.get("url"), "source": it.get("source"), "weight": round(w, 4), "score": round(s, 4)}
-        for _, s, w, it in scored if s > 0
-    ][:3]
-    negatives = [
-        {"title": it.get("title"), "url": it.get("url"), "source": it.get("source"), "weight": round(w, 4), "score": round(s, 4)}
-        for _, s, w, it in reversed(scored) if s < 0
-    ][:3]
+    # Use description text when available to enrich sentiment
+    scored = scored_items(items, now)
+
+    # The headline summary spans every fetched item; named windows are prefixes of it
+    spans = {name: WINDOWS[name] for name in (windows if windows is not None else WINDOWS)}
+    spans["all"] = float("inf")
+    stats = compute_windows(scored, spans)
+    # A partial run (sources cut off by the run deadline) is less certain
+    missing_sources = missing_sources or []
+    coverage = source_coverage(missing_sources, expected_sources or missing_sources)
+    if coverage < 1.0:
+        for window in stats.values():
+            window["confidence"] = round(window["confidence"] * coverage, 4)
+    overall = stats.pop("all")
+
+    c01 = overall["crypto_sentiment"]
+    g01 = overall["global_sentiment"]
+    combined01 = overall["combined_sentiment"]
+    combined_conf = overall["confidence"]
+    c_count = overall["counts"]["crypto"]
+    g_count = overall["counts"]["global"]
+    positives = overall["drivers"]["positive"]
+    negatives = overall["drivers"]["negative"]
+
+    assets = compute_asset_table(scored, build_symbol_index(scored))
+    decayed = update_decayed_state(state, items, scored, now) if state is not None else None
 
     updated_at = now.isoformat()
 
@@ -110,6 +422,7 @@ def aggregate(items: List[Dict], history: List[Dict]) -> Dict:
         "combined_sentiment": round(combined01, 4),
         "confidence": round(combined_conf, 4),
         "counts": {"crypto": c_count, "global": g_count},
+        "distribution": overall["distribution"],
         
         # Enhanced market indicators
         "market_indicators": {
@@ -155,15 +468,11 @@ def aggregate(items: List[Dict], history: List[Dict]) -> Dict:
     }
 
     # History update
-    history_entry = {
-        "ts": updated_at,
-        "crypto": round(c01, 4),
-        "global": round(g01, 4),
-        "combined": round(combined01, 4),
-        "counts": {"crypto": c_count, "global": g_count},
-    }
+    history_entry = history_point(overall, now)
 
-    history = (history or [])[-95:]  # keep ~4 days hourly
+    # Series span the whole retained history; the raw list keeps ~4 days hourly
+    series = history_series((history or []) + [history_entry], now)
+    history = (history or [])[-95:]
     history.append(history_entry)
 
     result = {
@@ -182,10 +491,14 @@ def aggregate(items: List[Dict], history: List[Dict]) -> Dict:
         },
         
         "summary": summary,
+        "windows": stats,
+        "assets": assets,
         "history": history,
+        "series": series,
         "drivers": {
             "positive": positives, 
             "negative": negatives,
+            **compute_driver_breakdown(scored),
             "market_movers": {
                 "high_activity": market_indicators.get("high_activity_coins", [])[:3],
                 "momentum_shifts": market_indicators.get("momentum_shifts", [])[:3]
@@ -193,6 +506,17 @@ def aggregate(items: List[Dict], history: List[Dict]) -> Dict:
         },
         "notes": {"warnings": []},
     }
+    if missing_sources:
+        result["notes"]["missing_sources"] = list(missing_sources)
+        result["notes"]["coverage"] = round(coverage, 4)
+        result["notes"]["warnings"].append(
+            f"Partial snapshot: {len(missing_sources)} source(s) missed the run deadline"
+        )
+    if failed_sources:
+        result["notes"]["failed_sources"] = dict(failed_sources)
+        result["notes"]["warnings"].append(f"{len(failed_sources)} source(s) failed: {', '.join(failed_sources)}")
+    if decayed is not None:
+        result["decayed"] = decayed
     
     # Add daily recap if it's the recap time
     if is_daily_recap:
@@ -0,0 +1,142 @@
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+from datetime import datetime, timedelta, timezone
+import gzip
+import hashlib
+import os
+
+from .seen import item_key
+from .serialize import dumps, loads
+from .utils import parse_ts, utcnow
+
+ARCHIVE_DIR = os.getenv("FEED_ARCHIVE_DIR", os.path.join("analyzer", ".archive"))
+
+# A day starts a new segment file once the current one passes this size
+SEGMENT_MAX_BYTES = 8 * 1024 * 1024
+INDEX_NAME = "index.tsv"
+
+# Layout: <root>/<YYYY-MM-DD>/items-0001.ndjson.gz plus index.tsv.
+# Each append writes one gzip member per day; index rows locate an item by
+# segment, member offset/length and line within the member, so a scan only
+# decompresses the members holding matching rows.
+
+
+class IndexEntry(NamedTuple):
+    ts: float
+    source: str
+    url_hash: str
+    segment: int
+    offset: int
+    length: int
+    line: int
+
+
+def url_hash(url: str) -> str:
+    return hashlib.blake2b(url.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def item_hash(item: Dict) -> str:
+    return url_hash(item_key(item))
+
+
+def _segment_path(day_dir: str, segment: int) -> str:
+    return os.path.join(day_dir, f"items-{segment:04d}.ndjson.gz")
+
+
+def read_index(day_dir: str) -> List[IndexEntry]:
+    entries: List[IndexEntry] = []
+    try:
+        with open(os.path.join(day_dir, INDEX_NAME), "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) != 7:
+                    continue
+                entries.append(IndexEntry(float(parts[0]), parts[1], parts[2], int(parts[3]), int(parts[4]), int(parts[5]), int(parts[6])))
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def _append_day(day_dir: str, rows: List[tuple]) -> int:
+    existing = {e.url_hash for e in read_index(day_dir)}
+    fresh = []
+    for ts, source, h, it in rows:
+        if h in existing:
+            continue
+        existing.add(h)
+        fresh.append((ts, source, h, it))
+    if not fresh:
+        return 0
+
+    os.makedirs(day_dir, exist_ok=True)
+    segment = 1
+    while os.path.exists(_segment_path(day_dir, segment + 1)):
+        segment += 1
+    path = _segment_path(day_dir, segment)
+    if os.path.exists(path) and os.path.getsize(path) >= SEGMENT_MAX_BYTES:
+        segment += 1
+        path = _segment_path(day_dir, segment)
+
+    payload = b"".join(dumps(it) + b"\n" for _, _, _, it in fresh)
+    member = gzip.compress(payload)
+    with open(path, "ab") as f:
+        offset = f.tell()
+        f.write(member)
+    # Segment data is written before the index rows that point at it
+    with open(os.path.join(day_dir, INDEX_NAME), "a", encoding="utf-8") as f:
+        for line_no, (ts, source, h, _) in enumerate(fresh):
+            f.write(f"{ts:.3f}\t{source}\t{h}\t{segment}\t{offset}\t{len(member)}\t{line_no}\n")
+    return len(fresh)
+
+
+def append_items(items: List[Dict], root: str = ARCHIVE_DIR) -> int:
+    """Archive raw items into their publication-day partitions, skipping items already there (see item_hash)"""
+    by_day: Dict[str, List[tuple]] = {}
+    for it in items:
+        if not it.get("url"):
+            continue
+        published = it.get("published_at")
+        dt = parse_ts(published) if isinstance(published, str) else utcnow()
+        source = (it.get("source") or "").replace("\t", " ")
+        by_day.setdefault(dt.strftime("%Y-%m-%d"), []).append((dt.timestamp(), source, item_hash(it), it))
+    return sum(_append_day(os.path.join(root, day), rows) for day, rows in sorted(by_day.items()))
+
+
+def _days(start: datetime, end: datetime) -> Iterator[str]:
+    day = start.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    while day <= end:
+        yield day.strftime("%Y-%m-%d")
+        day += timedelta(days=1)
+
+
+def _scan_days(start: datetime, end: datetime, sources: Optional[Iterable[str]], root: str) -> Iterator[tuple]:
+    """(day_dir, matching IndexEntry list) per day in [start, end]; one day's index in memory at a time"""
+    lo, hi = start.timestamp(), end.timestamp()
+    wanted = set(sources) if sources is not None else None
+    for day in _days(start, end):
+        day_dir = os.path.join(root, day)
+        entries = [e for e in read_index(day_dir) if lo <= e.ts <= hi and (wanted is None or e.source in wanted)]
+        if entries:
+            yield day_dir, entries
+
+
+def scan_index(start: datetime, end: datetime, sources: Optional[Iterable[str]] = None, root: str = ARCHIVE_DIR) -> Iterator[tuple]:
+    """(day_dir, IndexEntry) for items published within [start, end], without touching segment data"""
+    for day_dir, entries in _scan_days(start, end, sources, root):
+        for e in entries:
+            yield day_dir, e
+
+
+def iter_items(start: datetime, end: datetime, root: str = ARCHIVE_DIR, sources: Optional[Iterable[str]] = None) -> Iterator[Dict]:
+    """Archived items published within [start, end], day by day"""
+    for day_dir, entries in _scan_days(start, end, sources, root):
+        members: Dict[tuple, List[int]] = {}
+        for e in entries:
+            members.setdefault((e.segment, e.offset, e.length), []).append(e.line)
+        for (segment, offset, length), lines in members.items():
+            with open(_segment_path(day_dir, segment), "rb") as f:
+                f.seek(offset)
+                # Split on the NDJSON record separator only: str.splitlines()
+                # would also break on U+2028/U+2029/\x85 inside the JSON text
+                rows = gzip.decompress(f.read(length)).split(b"\n")
+            for line_no in sorted(lines):
+                yield loads(rows[line_no])
@@ -0,0 +1,162 @@
+from typing import Callable, Deque, Dict, List, Optional, TypeVar
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+import os
+import threading
+import time
+
+from .serialize import load_cache, save_cache
+
+T = TypeVar("T")
+
+HEDGE_ENABLED = os.getenv("FEED_HTTP_HEDGE", "0") == "1"
+# Hedges may add at most this fraction of extra requests (plus a small burst)
+HEDGE_BUDGET_RATIO = float(os.getenv("FEED_HTTP_HEDGE_BUDGET", "0.05"))
+HEDGE_BUDGET_BURST = 2
+# Per-host latency samples kept, and how many are needed before hedging kicks in
+LATENCY_WINDOW = 200
+LATENCY_MIN_SAMPLES = 20
+HEDGE_QUANTILE = 0.95
+
+
+class Cancelled(Exception):
+    pass
+
+
+class LatencyTracker:
+    """Rolling per-host latency samples, kept across runs with load/save"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self.samples: Dict[str, Deque[float]] = {}
+        # Samples ever recorded per host, so since() can find the new ones
+        self.counts: Dict[str, int] = {}
+        self.dirty = False
+        self.lock = threading.Lock()
+
+    def record(self, host: str, seconds: float) -> None:
+        with self.lock:
+            self.samples.setdefault(host, deque(maxlen=self.window)).append(seconds)
+            self.counts[host] = self.counts.get(host, 0) + 1
+            self.dirty = True
+
+    def extend(self, samples: Dict[str, List[float]]) -> None:
+        """Fold in samples recorded elsewhere, e.g. by shard workers"""
+        for host, values in samples.items():
+            for seconds in values:
+                self.record(host, seconds)
+
+    def mark(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.counts)
+
+    def since(self, mark: Dict[str, int]) -> Dict[str, List[float]]:
+        """Samples recorded after mark() returned `mark`"""
+        out = {}
+        with self.lock:
+            for host, count in self.counts.items():
+                new = min(count - mark.get(host, 0), len(self.samples[host]))
+                if new > 0:
+                    out[host] = list(self.samples[host])[-new:]
+        return out
+
+    def load(self, path: str) -> None:
+        data = load_cache(path)
+        if not isinstance(data, dict):
+            return
+        with self.lock:
+            for host, values in data.items():
+                if isinstance(values, list):
+                    self.samples[host] = deque((float(v) for v in values), maxlen=self.window)
+
+    def save(self, path: str) -> None:
+        with self.lock:
+            if not self.dirty:
+                return
+            data = {host: list(values) for host, values in self.samples.items()}
+            self.dirty = False
+        save_cache(path, data)
+
+    def quantile(self, host: str, q: float = HEDGE_QUANTILE) -> Optional[float]:
+        with self.lock:
+            samples = sorted(self.samples.get(host, ()))
+        if len(samples) < LATENCY_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+class HedgeBudget:
+    """Caps hedges to a fraction of all requests"""
+
+    def __init__(self, ratio: float = HEDGE_BUDGET_RATIO, burst: int = HEDGE_BUDGET_BURST):
+        self.ratio = ratio
+        self.burst = burst
+        self.requests = 0
+        self.hedges = 0
+        self.lock = threading.Lock()
+
+    def count_request(self) -> None:
+        with self.lock:
+            self.requests += 1
+
+    def try_acquire(self) -> bool:
+        with self.lock:
+            if self.hedges < self.ratio * self.requests + self.burst:
+                self.hedges += 1
+                return True
+            return False
+
+
+latency = LatencyTracker()
+budget = HedgeBudget()
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hedge")
+        return _pool
+
+
+def _timed(host: str, fn: Callable[[threading.Event], T], cancel: threading.Event) -> T:
+    start = time.monotonic()
+    result = fn(cancel)
+    latency.record(host, time.monotonic() - start)
+    return result
+
+
+def hedged_call(host: str, fn: Callable[[threading.Event], T], enabled: bool = HEDGE_ENABLED) -> T:
+    """Run fn, duplicating it once if it outlives the host's p95 latency.
+
+    fn receives a cancellation event and should stop early once it is set
+    (the losing attempt is told to abandon its response). The first attempt to
+    finish successfully wins; a hedge is only sent while the budget allows.
+    """
+    budget.count_request()
+    delay = latency.quantile(host) if enabled else None
+    if delay is None:
+        return _timed(host, fn, threading.Event())
+
+    pool = _get_pool()
+    attempts: Dict[Future, threading.Event] = {}
+    primary_cancel = threading.Event()
+    attempts[pool.submit(_timed, host, fn, primary_cancel)] = primary_cancel
+    done, _ = wait(list(attempts), timeout=delay)
+    if not done and budget.try_acquire():
+        hedge_cancel = threading.Event()
+        attempts[pool.submit(_timed, host, fn, hedge_cancel)] = hedge_cancel
+
+    pending = set(attempts)
+    error: Optional[BaseException] = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for fut in done:
+            if fut.exception() is None:
+                for loser in pending:
+                    attempts[loser].set()
+                return fut.result()
+            error = fut.exception()
+    raise error
@@ -0,0 +1,252 @@
+from typing import Dict, Optional, Tuple
+from email.utils import parsedate_to_datetime
+import hashlib
+import os
+import threading
+import time
+
+from .serialize import dumps, loads, write_atomic
+
+HTTP_CACHE_MAX_BYTES = int(os.getenv("FEED_HTTP_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# How long a stale body may stand in for a failing upstream when the
+# response carried no stale-if-error directive of its own; off unless the
+# operator opts in, so an outage never silently serves day-old data
+DEFAULT_STALE_IF_ERROR = int(os.getenv("FEED_STALE_IF_ERROR", "0"))
+
+CACHEABLE_STATUS = {200, 203}
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    directives: Dict[str, Optional[str]] = {}
+    for part in (value or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, arg = part.partition("=")
+        directives[name.strip().lower()] = arg.strip().strip('"') if arg else None
+    return directives
+
+
+def _seconds(value: Optional[str]) -> Optional[int]:
+    try:
+        return max(0, int(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def _header(headers: Dict[str, str], name: str) -> Optional[str]:
+    name = name.lower()
+    for k, v in headers.items():
+        if k.lower() == name:
+            return v
+    return None
+
+
+class CacheEntry:
+    def __init__(self, meta: Dict, body: bytes):
+        self.meta = meta
+        self.body = body
+
+    @property
+    def status(self) -> int:
+        return self.meta["status"]
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return self.meta["headers"]
+
+    def age(self, now: float) -> float:
+        return self.meta["initial_age"] + (now - self.meta["response_time"])
+
+    def is_fresh(self, now: float) -> bool:
+        return not self.meta["no_cache"] and self.age(now) < self.meta["lifetime"]
+
+    def usable_on_error(self, now: float) -> bool:
+        if self.meta["must_revalidate"]:
+            return False
+        return self.age(now) < self.meta["lifetime"] + self.meta["stale_if_error"]
+
+    def validators(self) -> Dict[str, str]:
+        out = {}
+        if self.meta.get("etag"):
+            out["If-None-Match"] = self.meta["etag"]
+        if self.meta.get("last_modified"):
+            out["If-Modified-Since"] = self.meta["last_modified"]
+        return out
+
+
+def _freshness(headers: Dict[str, str], request_time: float, response_time: float) -> Optional[Dict]:
+    """Freshness metadata per RFC 9111 for a private cache, or None if the response must not be stored"""
+    cc = parse_cache_control(_header(headers, "Cache-Control"))
+    if "no-store" in cc or (_header(headers, "Vary") or "").strip() == "*":
+        return None
+    date = _http_date(_header(headers, "Date")) or response_time
+    # Corrected initial age (RFC 9111 §4.2.3)
+    apparent_age = max(0.0, response_time - date)
+    age_value = _seconds(_header(headers, "Age")) or 0
+    initial_age = max(apparent_age, age_value + (response_time - request_time))
+
+    lifetime = _seconds(cc.get("max-age"))
+    if lifetime is None:
+        expires = _http_date(_header(headers, "Expires"))
+        lifetime = max(0.0, expires - date) if expires is not None else 0.0
+    stale_if_error = _seconds(cc.get("stale-if-error"))
+    return {
+        "initial_age": initial_age,
+        "response_time": response_time,
+        "lifetime": float(lifetime),
+        "stale_if_error": float(DEFAULT_STALE_IF_ERROR if stale_if_error is None else stale_if_error),
+        "no_cache": "no-cache" in cc,
+        "must_revalidate": "must-revalidate" in cc,
+    }
+
+
+class HttpCache:
+    """On-disk response cache keyed by URL: <key>.body holds the bytes, <key>.json the metadata"""
+
+    def __init__(self, root: str, max_bytes: int = HTTP_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        # Bytes of stored bodies, counted from disk on first use and then
+        # kept up to date by store/delete so evict() only scans when over.
+        # The fetch and hedge pools share one cache, so every read-modify-write
+        # of it (and eviction) holds _lock; reentrant as store() calls evict()
+        self._total: Optional[int] = None
+        self._lock = threading.RLock()
+
+    def _body_size(self, path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            if self._total is None:
+                total = 0
+                for dirpath, _, files in os.walk(self.root):
+                    for name in files:
+                        if name.endswith(".body"):
+                            total += self._body_size(os.path.join(dirpath, name))
+                self._total = total
+            return self._total
+
+    def _paths(self, url: str) -> Tuple[str, str]:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.root, key[:2], key)
+        return base + ".json", base + ".body"
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "rb") as f:
+                meta = loads(f.read())
+            with open(body_path, "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        if len(body) != meta.get("size"):
+            return None
+        return CacheEntry(meta, body)
+
+    def _write_meta(self, meta_path: str, meta: Dict) -> None:
+        write_atomic(meta_path, dumps(meta))
+
+    def store(self, status: int, headers: Dict[str, str], body: bytes, url: str, request_time: float) -> None:
+        if status not in CACHEABLE_STATUS:
+            return
+        now = time.time()
+        fresh = _freshness(headers, request_time, now)
+        if fresh is None:
+            return
+        meta_path, body_path = self._paths(url)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        with self._lock:
+            total = self.total_bytes() - self._body_size(body_path)
+            write_atomic(body_path, body)
+            self._total = total + len(body)
+            self._write_meta(meta_path, {
+                **fresh,
+                "status": status,
+                "headers": headers,
+                "etag": _header(headers, "ETag"),
+                "last_modified": _header(headers, "Last-Modified"),
+                "size": len(body),
+                "last_access": now,
+            })
+            if self._total > self.max_bytes:
+                self.evict()
+
+    def refresh(self, entry: CacheEntry, headers: Dict[str, str], url: str, request_time: float) -> None:
+        """Apply a 304's headers to a stored entry (RFC 9111 §4.3.4)"""
+        now = time.time()
+        merged = {**entry.headers, **headers}
+        fresh = _freshness(merged, request_time, now)
+        if fresh is None:
+            self.delete(url)
+            return
+        entry.meta.update(fresh)
+        entry.meta["headers"] = merged
+        entry.meta["etag"] = _header(merged, "ETag")
+        entry.meta["last_modified"] = _header(merged, "Last-Modified")
+        entry.meta["last_access"] = now
+        self._write_meta(self._paths(url)[0], entry.meta)
+
+    def touch(self, entry: CacheEntry, url: str) -> None:
+        entry.meta["last_access"] = time.time()
+        self._write_meta(self._paths(url)[0], entry.meta)
+
+    def delete(self, url: str) -> None:
+        meta_path, body_path = self._paths(url)
+        with self._lock:
+            size = self._body_size(body_path)
+            for path in (meta_path, body_path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            if self._total is not None:
+                self._total = max(0, self._total - size)
+
+    def evict(self) -> None:
+        """Drop least recently used entries until the bodies fit in max_bytes.
+
+        Reads every entry's metadata, so callers only run it once the tracked
+        total is over the limit; the scan also re-syncs that total with disk
+        (other processes share the directory).
+        """
+        with self._lock:
+            entries = []
+            total = 0
+            for dirpath, _, files in os.walk(self.root):
+                for name in files:
+                    if not name.endswith(".json"):
+                        continue
+                    meta_path = os.path.join(dirpath, name)
+                    try:
+                        with open(meta_path, "rb") as f:
+                            meta = loads(f.read())
+                    except (OSError, ValueError):
+                        continue
+                    entries.append((meta.get("last_access", 0), meta.get("size", 0), meta_path))
+                    total += meta.get("size", 0)
+            entries.sort()
+            for _, size, meta_path in entries:
+                if total <= self.max_bytes:
+                    break
+                for path in (meta_path, meta_path[:-len(".json")] + ".body"):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                total -= size
+            self._total = total
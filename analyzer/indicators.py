@@ -1,8 +1,10 @@
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timezone, timedelta
-import json
 import math
-from .utils import http_get, utcnow
+import os
+from .serialize import load_cache, loads, save_cache
+from .utils import http_get, utcnow, parse_ts, CACHE_DIR
+from .symbols import SymbolExtractor, build_symbol_universe, install_symbol_universe
 
 def fetch_coingecko_market_data() -> Dict:
     """Fetch comprehensive market data from CoinGecko"""
@@ -15,7 +17,7 @@ def fetch_coingecko_market_data() -> Dict:
         if status != 200:
             return {}
             
-        data = json.loads(content.decode("utf-8"))
+        data = loads(content)
         return {"coins": data, "fetched_at": utcnow().isoformat()}
     except Exception:
         return {}
@@ -28,7 +30,7 @@ def fetch_fear_greed_detailed() -> Dict:
         if status != 200:
             return {}
             
-        data = json.loads(content.decode("utf-8"))
+        data = loads(content)
         if "data" not in data:
             return {}
             
@@ -336,14 +338,25 @@ def determine_dominance(btc_dominance: float, eth_dominance: float, alt_season_s
     else:
         return "mixed"
 
-def generate_market_indicators() -> Dict:
-    """Generate comprehensive market indicators combining all data sources"""
+def generate_market_indicators(universe: Optional[List[SymbolExtractor]] = None) -> Dict:
+    """Generate comprehensive market indicators combining all data sources.
+
+    The CoinGecko coin list also rebuilds the symbol universe. It is installed
+    right away, or, if `universe` is given, appended to it for the caller to
+    install (e.g. from the main thread once a background fetch has joined).
+    """
     
     # Fetch all data sources
     coingecko_data = fetch_coingecko_market_data()
     fear_greed = fetch_fear_greed_detailed()
     
     coins_data = coingecko_data.get("coins", [])
+    extractor = build_symbol_universe(coins_data)
+    if extractor is not None:
+        if universe is None:
+            install_symbol_universe(extractor)
+        else:
+            universe.append(extractor)
     
     # Calculate all indicators
     regime = calculate_market_regime(coins_data)
@@ -419,4 +432,38 @@ def generate_market_indicators() -> Dict:
         "coins_analyzed": len(coins_data)
     }
     
-    return indicators 
\ No newline at end of file
+    return indicators
+
+INDICATORS_SNAPSHOT_PATH = os.path.join(CACHE_DIR, "indicators.json")
+# Snapshots younger than this are reused instead of hitting CoinGecko/alternative.me
+INDICATORS_TTL = timedelta(hours=1)
+
+def load_indicators_snapshot(max_age: Optional[timedelta] = INDICATORS_TTL, path: str = INDICATORS_SNAPSHOT_PATH) -> Optional[Dict]:
+    """Cached indicators snapshot, or None if missing or older than max_age (None = any age)"""
+    snapshot = load_cache(path)
+    if not snapshot or not snapshot.get("timestamp"):
+        return None
+    if max_age is not None and utcnow() - parse_ts(snapshot["timestamp"]) > max_age:
+        return None
+    return snapshot
+
+def refresh_market_indicators(path: str = INDICATORS_SNAPSHOT_PATH, universe: Optional[List[SymbolExtractor]] = None) -> Dict:
+    """Fetch fresh indicators and cache them.
+
+    If every upstream failed, the previous snapshot (any age) is returned, or
+    an empty dict; an empty result is never cached, so the next run retries
+    instead of serving it as fresh for INDICATORS_TTL.
+    """
+    indicators = generate_market_indicators(universe)
+    if indicators.get("data_sources", 0) == 0:
+        return load_indicators_snapshot(max_age=None, path=path) or {}
+    save_cache(path, indicators)
+    return indicators
+
+def get_market_indicators(
+    max_age: Optional[timedelta] = INDICATORS_TTL, offline: bool = False, universe: Optional[List[SymbolExtractor]] = None
+) -> Dict:
+    """Indicators for a run: the cached snapshot while fresh, otherwise a refresh (never in offline mode)"""
+    if offline:
+        return load_indicators_snapshot(max_age=None) or {}
+    return load_indicators_snapshot(max_age) or refresh_market_indicators(universe=universe)
@@ -0,0 +1,41 @@
+from typing import Any, Callable, List, Optional, Sequence
+from concurrent.futures import ProcessPoolExecutor
+import atexit
+import os
+
+# Batches below this size are cheaper to run inline than to ship to workers
+PARALLEL_MIN_ITEMS = int(os.getenv("FEED_PARALLEL_MIN_ITEMS", "2000"))
+MAX_WORKERS = int(os.getenv("FEED_WORKERS", "0")) or (os.cpu_count() or 1)
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Shared worker pool, created on first use and reused for the life of the process"""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS)
+        atexit.register(shutdown_pool)
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+def should_parallelize(n: int) -> bool:
+    return MAX_WORKERS > 1 and n >= PARALLEL_MIN_ITEMS
+
+
+def chunk_bounds(n: int, workers: int = MAX_WORKERS) -> List[range]:
+    # A few chunks per worker keeps the pool busy when chunks finish unevenly
+    size = max(1, -(-n // (workers * 4)))
+    return [range(i, min(n, i + size)) for i in range(0, n, size)]
+
+
+def map_chunks(fn: Callable[[Any], Any], chunks: Sequence[Any]) -> List[Any]:
+    """Run fn over chunks on the shared pool, results in chunk order"""
+    return list(get_pool().map(fn, chunks))
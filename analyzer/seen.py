@@ -0,0 +1,165 @@
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import hashlib
+import math
+import os
+import time
+
+from .serialize import dumps, loads
+from .utils import CACHE_DIR, normalize_url
+
+SEEN_FILTER_PATH = os.path.join(CACHE_DIR, "seen.bloom")
+
+# Items per generation, overall false-positive target, and how many
+# generations are kept; memory is fixed at GENERATIONS * bits_per_generation.
+SEEN_CAPACITY = int(os.getenv("FEED_SEEN_CAPACITY", "1000000"))
+SEEN_FP_RATE = float(os.getenv("FEED_SEEN_FP_RATE", "0.001"))
+SEEN_GENERATIONS = 4
+# A generation also rotates out after this long, so old URLs age away
+SEEN_PERIOD_DAYS = 30
+
+_MAGIC = b"SEENBF1\n"
+
+
+def seen_key(url: str) -> str:
+    """Normalized URL: no fragment, lower-case scheme/host, no utm_* params or trailing slash"""
+    parts = urlsplit(normalize_url(url))
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not k.startswith("utm_")])
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ""))
+
+
+def series_key(item: Dict) -> Optional[str]:
+    """Key shared by every reading of an item (see item_key): its normalized URL"""
+    url = item.get("url")
+    return seen_key(url) if url else None
+
+
+def item_key(item: Dict) -> Optional[str]:
+    """Identity of one item: its normalized URL.
+
+    Market snapshots (tickers, funding, indicators; "snapshot": True) reuse
+    one URL per symbol, so each reading is told apart by its publish time as
+    well. Their series_key is what readings share: the live slot in the
+    decayed state and the "latest reading" in carried items and backfill.
+    The seen filter, archive and store all key items by item_key.
+    """
+    key = series_key(item)
+    if key is not None and item.get("snapshot"):
+        key += " @" + str(item.get("published_at") or "")
+    return key
+
+
+class SeenFilter:
+    """Rotating Bloom filter over item keys (see item_key).
+
+    New keys go into the newest generation; a lookup checks every generation.
+    When the newest generation fills up (or ages past SEEN_PERIOD_DAYS) the
+    oldest one is dropped, so memory never exceeds the configured generations
+    however many URLs pass through.
+    """
+
+    def __init__(self, capacity: int = SEEN_CAPACITY, fp_rate: float = SEEN_FP_RATE, generations: int = SEEN_GENERATIONS):
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.max_generations = generations
+        # Each generation gets a share of the false-positive budget
+        per_gen = fp_rate / generations
+        self.bits = max(64, int(math.ceil(-capacity * math.log(per_gen) / (math.log(2) ** 2))))
+        self.bits += (-self.bits) % 8
+        self.hashes = max(1, int(round(self.bits / capacity * math.log(2))))
+        self.generations: List[Dict] = []
+        self._rotate()
+        # Set by add/rotate; save() skips the rewrite when nothing changed
+        self.dirty = True
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.max_generations * self.bits // 8
+
+    def _rotate(self) -> None:
+        self.generations.append({"created": time.time(), "count": 0, "data": bytearray(self.bits // 8)})
+        del self.generations[:-self.max_generations]
+        self.dirty = True
+
+    def _positions(self, key: str) -> List[int]:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        m = self.bits
+        return [(h1 + i * h2) % m for i in range(self.hashes)]
+
+    def __contains__(self, key: str) -> bool:
+        positions = self._positions(key)
+        for gen in self.generations:
+            data = gen["data"]
+            if all(data[p >> 3] & (1 << (p & 7)) for p in positions):
+                return True
+        return False
+
+    def add(self, key: str) -> None:
+        current = self.generations[-1]
+        if current["count"] >= self.capacity or time.time() - current["created"] > SEEN_PERIOD_DAYS * 86400:
+            self._rotate()
+            current = self.generations[-1]
+        data = current["data"]
+        for p in self._positions(key):
+            data[p >> 3] |= 1 << (p & 7)
+        current["count"] += 1
+        self.dirty = True
+
+    def save(self, path: str = SEEN_FILTER_PATH) -> None:
+        """Write the filter to path; a no-op if nothing was added since the last load or save"""
+        if not self.dirty and os.path.exists(path):
+            return
+        header = {
+            "capacity": self.capacity,
+            "fp_rate": self.fp_rate,
+            "max_generations": self.max_generations,
+            "bits": self.bits,
+            "hashes": self.hashes,
+            "generations": [{"created": g["created"], "count": g["count"]} for g in self.generations],
+        }
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_MAGIC)
+            f.write(dumps(header) + b"\n")
+            for g in self.generations:
+                f.write(g["data"])
+        os.replace(tmp, path)
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: str = SEEN_FILTER_PATH) -> Optional["SeenFilter"]:
+        """Filter saved at path, or None if it is missing, unreadable or was sized differently"""
+        try:
+            with open(path, "rb") as f:
+                if f.read(len(_MAGIC)) != _MAGIC:
+                    return None
+                header = loads(f.readline())
+                flt = cls(header["capacity"], header["fp_rate"], header["max_generations"])
+                if flt.bits != header["bits"] or flt.hashes != header["hashes"]:
+                    return None
+                flt.generations = []
+                for g in header["generations"]:
+                    data = bytearray(f.read(flt.bits // 8))
+                    if len(data) != flt.bits // 8:
+                        return None
+                    flt.generations.append({"created": g["created"], "count": g["count"], "data": data})
+                if not flt.generations:
+                    flt._rotate()
+                flt.dirty = False
+                return flt
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+def load_seen_filter(path: str = SEEN_FILTER_PATH) -> SeenFilter:
+    flt = SeenFilter.load(path)
+    if flt is None or flt.capacity != SEEN_CAPACITY or flt.fp_rate != SEEN_FP_RATE:
+        # Resized by configuration: start over rather than mix geometries
+        flt = SeenFilter()
+    return flt
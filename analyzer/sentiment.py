@@ -1,5 +1,17 @@
-from typing import Dict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from abc import ABC, abstractmethod
+from array import array
+import math
+import mmap
+import os
 import re
+import struct
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # optional: the hashed scorer falls back to pure Python
+    np = None
 
 from .utils import detect_crypto_symbols
 
@@ -46,4 +58,206 @@ def score_text(text: str) -> float:
         if k in t:
             base += v
     # Cashtag/contract presence mild boost to magnitude confidence on weighting side
-    return clamp(base) 
\ No newline at end of file
+    return clamp(base) 
+
+
+class Scorer(ABC):
+    """Maps text to a sentiment in [-1, 1]; backends implement score and may
+    override score_batch with something faster than a loop"""
+
+    name = "base"
+
+    @abstractmethod
+    def score(self, text: str) -> float:
+        ...
+
+    def score_batch(self, texts: Sequence[str]) -> List[float]:
+        return [self.score(t) for t in texts]
+
+
+class LexiconScorer(Scorer):
+    name = "lexicon"
+
+    def score(self, text: str) -> float:
+        return score_text(text)
+
+
+# Hashed linear model: unigrams and bigrams hashed (signed) into 2**bits
+# float32 weights, logistic output mapped to [-1, 1]. A unigram hashes as
+# crc32 of the token; a bigram mixes its two unigram hashes, so a batch only
+# hashes its distinct tokens and derives bigrams with array arithmetic.
+# File layout: HEADER, then the raw little-endian weights, so the weights can
+# be mapped without copying.
+MODEL_MAGIC = b"MSFHLR1\0"
+MODEL_HEADER = struct.Struct("<8sIIdQ")  # magic, version, bits, bias, trained examples
+MODEL_VERSION = 2
+DEFAULT_BITS = 18
+TOKEN_RE = re.compile(r"[$a-z0-9][a-z0-9']*")
+# Tokens of a whole batch joined by NUL, with the separators as tokens too
+_BATCH_SEP = "\0"
+_BATCH_TOKEN_RE = re.compile(r"[$a-z0-9][a-z0-9']*|\0")
+
+_MIX_A = 0x9E3779B1
+_MIX_B = 0x85EBCA6B
+
+# Unigram hashes by token; headlines reuse a small vocabulary
+_hash_cache: Dict[str, int] = {}
+HASH_CACHE_MAX = 200_000
+
+
+def _token_hash(token: str) -> int:
+    h = _hash_cache.get(token)
+    if h is None:
+        h = zlib.crc32(token.encode("utf-8"))
+        if len(_hash_cache) >= HASH_CACHE_MAX:
+            _hash_cache.clear()
+        _hash_cache[token] = h
+    return h
+
+
+def _bigram_hash(a: int, b: int) -> int:
+    # Same 32-bit arithmetic as the vectorized path in score_batch
+    x = ((a * _MIX_A) & 0xFFFFFFFF) ^ b
+    x ^= x >> 15
+    x = (x * _MIX_B) & 0xFFFFFFFF
+    return x ^ (x >> 13)
+
+
+def hashed_features(text: str, bits: int) -> Tuple[List[int], List[float]]:
+    """Weight indices and signed values of the text's unigrams and bigrams, L2-normalized"""
+    tokens = TOKEN_RE.findall(text.lower())
+    if not tokens:
+        return [], []
+    mask = (1 << bits) - 1
+    value = 1.0 / math.sqrt(2 * len(tokens) - 1)
+    idx, vals = [], []
+    prev = None
+    for t in tokens:
+        h = _token_hash(t)
+        hashes = (h,) if prev is None else (h, _bigram_hash(prev, h))
+        for f in hashes:
+            idx.append(f & mask)
+            vals.append(value if f & 0x80000000 else -value)
+        prev = h
+    return idx, vals
+
+
+def save_model(path: str, weights: Sequence[float], bits: int, bias: float, examples: int = 0) -> None:
+    if len(weights) != 1 << bits:
+        raise ValueError(f"Expected {1 << bits} weights, got {len(weights)}")
+    dirname = os.path.dirname(path)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    data = array("f", weights)
+    if data.itemsize != 4:
+        raise ValueError("float32 arrays are required")
+    if struct.pack("=I", 1) != struct.pack("<I", 1):
+        data.byteswap()
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MODEL_HEADER.pack(MODEL_MAGIC, MODEL_VERSION, bits, bias, examples))
+        f.write(data.tobytes())
+    os.replace(tmp, path)
+
+
+class HashedLinearScorer(Scorer):
+    """Logistic regression over hashed features, batched as one sparse dot product"""
+
+    name = "hashed"
+
+    def __init__(self, weights, bits: int, bias: float = 0.0):
+        self.weights = weights
+        self.bits = bits
+        self.bias = bias
+
+    @classmethod
+    def load(cls, path: str) -> "HashedLinearScorer":
+        """Map the model file read-only; processes sharing it share the pages"""
+        with open(path, "rb") as f:
+            head = f.read(MODEL_HEADER.size)
+            if len(head) < MODEL_HEADER.size:
+                raise ValueError(f"Not a sentiment model: {path}")
+            magic, version, bits, bias, _ = MODEL_HEADER.unpack(head)
+            if magic != MODEL_MAGIC or version != MODEL_VERSION:
+                raise ValueError(f"Not a sentiment model: {path}")
+            if os.fstat(f.fileno()).st_size != MODEL_HEADER.size + 4 * (1 << bits):
+                raise ValueError(f"Truncated sentiment model: {path}")
+            if np is not None:
+                weights = np.memmap(path, dtype="<f4", mode="r", offset=MODEL_HEADER.size, shape=(1 << bits,))
+            else:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                weights = memoryview(mm)[MODEL_HEADER.size:].cast("f")
+        return cls(weights, bits, bias)
+
+    def score(self, text: str) -> float:
+        idx, vals = hashed_features(text, self.bits)
+        if not idx:
+            # No tokens, no evidence: neutral rather than the bias
+            return 0.0
+        w = self.weights
+        z = self.bias + sum(float(w[i]) * v for i, v in zip(idx, vals))
+        return math.tanh(z / 2.0)  # == 2 * sigmoid(z) - 1
+
+    def score_batch(self, texts: Sequence[str]) -> List[float]:
+        """Tokenizes the batch in one pass, hashes each distinct token once and
+        scores every text with array operations"""
+        if np is None or not texts:
+            return [self.score(t) for t in texts]
+        joined = _BATCH_SEP.join(texts).lower()
+        if joined.count(_BATCH_SEP) != len(texts) - 1:
+            # A text contains NUL itself, so rows cannot be told apart
+            return [self.score(t) for t in texts]
+        tokens = _BATCH_TOKEN_RE.findall(joined)
+        vocab = {t: i for i, t in enumerate(dict.fromkeys(tokens))}
+        ids = np.fromiter(map(vocab.__getitem__, tokens), dtype=np.intp, count=len(tokens))
+        uni = np.fromiter(map(_token_hash, vocab), dtype=np.uint32, count=len(vocab))
+        sep = ids == vocab.get(_BATCH_SEP, -1)
+        rows = np.cumsum(sep)
+        word = ~sep
+        h = uni[ids]
+        # Bigrams: consecutive words (a separator between rows breaks the pair)
+        pair = word[1:] & word[:-1]
+        x = (h[:-1][pair] * np.uint32(_MIX_A)) ^ h[1:][pair]
+        x ^= x >> np.uint32(15)
+        x *= np.uint32(_MIX_B)
+        x ^= x >> np.uint32(13)
+        feats = np.concatenate((h[word], x))
+        feat_rows = np.concatenate((rows[word], rows[1:][pair]))
+        signs = np.where(feats & np.uint32(0x80000000), np.float32(1.0), np.float32(-1.0))
+        contrib = self.weights[(feats & np.uint32((1 << self.bits) - 1)).astype(np.intp)] * signs
+        n = np.bincount(rows[word], minlength=len(texts))
+        sums = np.bincount(feat_rows, weights=contrib, minlength=len(texts))
+        z = self.bias + sums / np.sqrt(np.maximum(2 * n - 1, 1))
+        return np.where(n > 0, np.tanh(z / 2.0), 0.0).tolist()
+
+
+SCORER_NAME = os.getenv("FEED_SCORER", "lexicon")
+SCORER_MODEL_PATH = os.getenv("FEED_SCORER_MODEL", os.path.join(os.path.dirname(__file__), "models", "sentiment.bin"))
+
+def _configured_hashed_scorer() -> HashedLinearScorer:
+    if not os.path.isfile(SCORER_MODEL_PATH):
+        raise ValueError(
+            f"FEED_SCORER=hashed needs a model file, none at {SCORER_MODEL_PATH!r}; "
+            "point FEED_SCORER_MODEL at one or train it with `python cli.py train-scorer`"
+        )
+    return HashedLinearScorer.load(SCORER_MODEL_PATH)
+
+
+# FEED_SCORER value -> backend factory
+SCORERS: Dict[str, Callable[[], Scorer]] = {
+    "lexicon": LexiconScorer,
+    "hashed": _configured_hashed_scorer,
+}
+
+_scorer: Optional[Scorer] = None
+
+
+def get_scorer() -> Scorer:
+    """The configured scorer, built once per process; ValueError if FEED_SCORER
+    or its model file is unusable"""
+    global _scorer
+    if _scorer is None:
+        if SCORER_NAME not in SCORERS:
+            raise ValueError(f"Unknown scorer {SCORER_NAME!r} (FEED_SCORER); expected one of {sorted(SCORERS)}")
+        _scorer = SCORERS[SCORER_NAME]()
+    return _scorer
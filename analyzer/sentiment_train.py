@@ -0,0 +1,156 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+from array import array
+import math
+import random
+import time
+
+from .sentiment import DEFAULT_BITS, HashedLinearScorer, LexiconScorer, Scorer, hashed_features, save_model
+from .serialize import loads
+
+# Scores within this band count as neutral, as in aggregate.scored_items
+NEUTRAL_BAND = 0.1
+LABEL_NAMES = {"positive": 1.0, "pos": 1.0, "neutral": 0.0, "negative": -1.0, "neg": -1.0}
+
+
+def load_labelled(path: str) -> List[Tuple[str, float]]:
+    """(text, label in [-1, 1]) from a JSON array or JSON Lines file.
+
+    Each record has "text" (or "title") and "label": a number in [-1, 1] or
+    positive/neutral/negative. Records without both are skipped.
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    stripped = raw.lstrip()
+    if stripped.startswith(b"["):
+        records = loads(stripped)
+    else:
+        records = [loads(line) for line in raw.splitlines() if line.strip()]
+    out = []
+    for rec in records:
+        text = rec.get("text") or rec.get("title")
+        label = rec.get("label")
+        if isinstance(label, str):
+            label = LABEL_NAMES.get(label.strip().lower())
+        if not text or label is None:
+            continue
+        out.append((text, max(-1.0, min(1.0, float(label)))))
+    return out
+
+
+def _sigmoid(z: float) -> float:
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    e = math.exp(z)
+    return e / (1.0 + e)
+
+
+def train(
+    examples: List[Tuple[str, float]],
+    bits: int = DEFAULT_BITS,
+    epochs: int = 8,
+    lr: float = 0.5,
+    l2: float = 1e-6,
+    seed: int = 0,
+) -> Tuple[array, float]:
+    """SGD logistic regression on hashed features; returns (weights, bias).
+
+    Labels in [-1, 1] become targets (label + 1) / 2, so neutral examples pull
+    the output towards 0 instead of being dropped.
+    """
+    weights = array("d", bytes(8 * (1 << bits)))
+    bias = 0.0
+    feats = [(hashed_features(text, bits), (label + 1.0) / 2.0) for text, label in examples]
+    rng = random.Random(seed)
+    order = list(range(len(feats)))
+    step = 0
+    for _ in range(epochs):
+        rng.shuffle(order)
+        for k in order:
+            (idx, vals), target = feats[k]
+            rate = lr / math.sqrt(1.0 + step * 1e-3)
+            step += 1
+            z = bias + sum(weights[i] * v for i, v in zip(idx, vals))
+            g = _sigmoid(z) - target
+            bias -= rate * g
+            for i, v in zip(idx, vals):
+                weights[i] -= rate * (g * v + l2 * weights[i])
+    return weights, bias
+
+
+def train_model(path: str, out: str, bits: int = DEFAULT_BITS, epochs: int = 8, holdout: float = 0.2, seed: int = 0) -> Dict:
+    """Train from a labelled file and write the model; reports held-out agreement"""
+    examples = load_labelled(path)
+    if not examples:
+        raise ValueError(f"No labelled examples in {path}")
+    rng = random.Random(seed)
+    shuffled = examples[:]
+    rng.shuffle(shuffled)
+    n_test = int(len(shuffled) * holdout) if len(shuffled) > 4 else 0
+    test, fit = shuffled[:n_test], shuffled[n_test:]
+    weights, bias = train(fit, bits, epochs, seed=seed)
+    save_model(out, weights, bits, bias, len(fit))
+    report = {"model": out, "bits": bits, "examples": len(fit), "holdout": len(test)}
+    if test:
+        scorer = HashedLinearScorer.load(out)
+        report["holdout_label_accuracy"] = label_accuracy(scorer.score_batch([t for t, _ in test]), [l for _, l in test])
+    return report
+
+
+def _polarity(s: float) -> int:
+    return 0 if abs(s) <= NEUTRAL_BAND else (1 if s > 0 else -1)
+
+
+def label_accuracy(scores: Sequence[float], labels: Sequence[float]) -> Optional[float]:
+    """Share of polar (non-neutral) labels whose sign the scores get right"""
+    pairs = [(s, l) for s, l in zip(scores, labels) if _polarity(l) != 0]
+    if not pairs:
+        return None
+    return round(sum(1 for s, l in pairs if _polarity(s) == _polarity(l)) / len(pairs), 4)
+
+
+def _throughput(scorer: Scorer, texts: List[str], repeat: int) -> Tuple[List[float], float]:
+    best = float("inf")
+    scores: List[float] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        scores = scorer.score_batch(texts)
+        best = min(best, time.perf_counter() - t0)
+    return scores, len(texts) / best if best > 0 else float("inf")
+
+
+def benchmark(model_path: str, texts: List[str], labels: Optional[List[float]] = None, repeat: int = 3) -> Dict:
+    """Items/s of both scorers on the same texts, and how far they agree"""
+    lexicon = LexiconScorer()
+    hashed = HashedLinearScorer.load(model_path)
+    lex_scores, lex_rate = _throughput(lexicon, texts, repeat)
+    hashed_scores, hashed_rate = _throughput(hashed, texts, repeat)
+    lex_pol = [_polarity(s) for s in lex_scores]
+    hashed_pol = [_polarity(s) for s in hashed_scores]
+    polar = [(a, b) for a, b in zip(lex_pol, hashed_pol) if a != 0]
+    report = {
+        "items": len(texts),
+        "lexicon_items_per_s": round(lex_rate),
+        "hashed_items_per_s": round(hashed_rate),
+        # Same polarity (positive / neutral / negative) on every item
+        "polarity_agreement": round(sum(1 for a, b in zip(lex_pol, hashed_pol) if a == b) / len(texts), 4) if texts else None,
+        # Same sign where the lexicon has a clear sentiment
+        "sign_agreement_on_lexicon_polar": round(sum(1 for a, b in polar if a == b) / len(polar), 4) if polar else None,
+        "correlation": _pearson(lex_scores, hashed_scores),
+    }
+    if labels is not None:
+        report["lexicon_label_accuracy"] = label_accuracy(lex_scores, labels)
+        report["hashed_label_accuracy"] = label_accuracy(hashed_scores, labels)
+    return report
+
+
+def _pearson(xs: Sequence[float], ys: Sequence[float]) -> Optional[float]:
+    n = len(xs)
+    if n < 2:
+        return None
+    mx, my = sum(xs) / n, sum(ys) / n
+    sxy = sum((x - mx) * (y - my) for x, y in zip(xs, ys))
+    sxx = sum((x - mx) ** 2 for x in xs)
+    syy = sum((y - my) ** 2 for y in ys)
+    if sxx == 0 or syy == 0:
+        return None
+    return round(sxy / math.sqrt(sxx * syy), 4)
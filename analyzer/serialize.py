@@ -0,0 +1,116 @@
+from typing import Any, Optional, Union
+import json
+import os
+import tempfile
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is the fallback
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional: caches stay JSON without it
+    msgpack = None
+
+# Encoding of internal caches and state (FEED_CACHE_FORMAT=json|msgpack). orjson
+# decodes faster than msgpack, so MessagePack is only the default without it.
+# Public files (feed.json, history.json) are always JSON.
+CACHE_FORMAT = os.getenv("FEED_CACHE_FORMAT", "msgpack" if msgpack is not None and orjson is None else "json")
+
+
+def dumps(obj: Any, pretty: bool = False) -> bytes:
+    """UTF-8 JSON; pretty output matches json.dump(..., ensure_ascii=False, indent=2)"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(obj, option=option)
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_str(obj: Any) -> str:
+    return dumps(obj).decode("utf-8")
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """Decode JSON straight from bytes (no intermediate str); raises ValueError on bad input"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def pack(obj: Any) -> bytes:
+    return msgpack.packb(obj, use_bin_type=True)
+
+
+def unpack(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    dirname = os.path.dirname(path)
+    if dirname:  # Only create directory if path has a directory component
+        os.makedirs(dirname, exist_ok=True)
+    # Unique temp file in the same directory: concurrent writers of one path
+    # never share a temp file, and the rename stays on one filesystem
+    fd, tmp = tempfile.mkstemp(dir=dirname or ".", prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        # mkstemp creates 0600; keep the target's mode (or a normal 0644)
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+        os.chmod(tmp, mode)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _packed_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".msgpack"
+
+
+def cache_file(path: str) -> str:
+    """File a cache saved under path actually lives in"""
+    if CACHE_FORMAT == "msgpack" and msgpack is not None:
+        return _packed_path(path)
+    return path
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def save_cache(path: str, obj: Any) -> None:
+    """Write an internal cache; path names its JSON form, e.g. decay_state.json"""
+    target = cache_file(path)
+    write_atomic(target, pack(obj) if target != path else dumps(obj))
+    # Drop the other encoding so a format switch never reads stale data
+    _remove(path if target != path else _packed_path(path))
+
+
+def load_cache(path: str) -> Optional[Any]:
+    """Cache saved by save_cache in either encoding, or None if missing or unreadable"""
+    if msgpack is not None:
+        try:
+            with open(_packed_path(path), "rb") as f:
+                return unpack(f.read())
+        except FileNotFoundError:
+            pass
+        except ValueError:
+            return None
+    try:
+        with open(path, "rb") as f:
+            return loads(f.read())
+    except (FileNotFoundError, ValueError):
+        return None
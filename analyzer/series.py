@@ -0,0 +1,106 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+
+from .utils import parse_ts
+
+# Published history series: look-back span and point budget of each
+SERIES = {
+    "24h": (timedelta(hours=24), 96),
+    "7d": (timedelta(days=7), 168),
+    "30d": (timedelta(days=30), 180),
+    "1y": (timedelta(days=365), 365),
+}
+SERIES_FIELDS = ("crypto", "global", "combined")
+# Raw history points are kept this long (the longest series plus slack)
+HISTORY_RETENTION = timedelta(days=366)
+
+
+def lttb(xs: Sequence[float], ys: Sequence[float], threshold: int) -> List[int]:
+    """Largest-Triangle-Three-Buckets: indices of at most `threshold` points
+    that keep the visual shape of (xs, ys). First and last are always kept."""
+    n = len(xs)
+    if threshold >= n:
+        return list(range(n))
+    if threshold < 3:
+        return [0, n - 1][:max(threshold, 0)]
+    out = [0]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex
+        nxt_start = int((i + 1) * every) + 1
+        nxt_end = min(int((i + 2) * every) + 1, n)
+        span = nxt_end - nxt_start
+        avg_x = sum(xs[nxt_start:nxt_end]) / span
+        avg_y = sum(ys[nxt_start:nxt_end]) / span
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        ax, ay = xs[a], ys[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        out.append(best)
+        a = best
+    out.append(n - 1)
+    return out
+
+
+def _epoch(ts: str) -> float:
+    try:
+        dt = datetime.fromisoformat(ts)
+    except ValueError:
+        return parse_ts(ts).timestamp()
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def history_columns(history: List[Dict]) -> Tuple[List[float], Dict[str, List[float]]]:
+    """Time-ordered unix timestamps and per-field value columns; bad entries are skipped"""
+    rows = []
+    for e in history:
+        try:
+            rows.append((_epoch(e["ts"]), [float(e[f]) for f in SERIES_FIELDS]))
+        except (KeyError, TypeError, ValueError):
+            continue
+    rows.sort(key=lambda r: r[0])
+    ts = [t for t, _ in rows]
+    cols = {f: [vals[i] for _, vals in rows] for i, f in enumerate(SERIES_FIELDS)}
+    return ts, cols
+
+
+def history_series(history: List[Dict], now: datetime, spans: Optional[Dict[str, Tuple[timedelta, int]]] = None) -> Dict:
+    """Columnar, LTTB-downsampled history per span: {name: {t, crypto, global, combined}}.
+
+    Points are picked on the combined line and the same indices are used for
+    every column, so the arrays stay aligned. `t` is unix seconds.
+    """
+    ts, cols = history_columns(history)
+    end = now.timestamp()
+    out: Dict[str, Dict] = {}
+    for name, (span, budget) in (spans or SERIES).items():
+        start = end - span.total_seconds()
+        lo = bisect_left(ts, start)
+        xs = ts[lo:]
+        keep = lttb(xs, cols["combined"][lo:], budget)
+        series = {"t": [int(xs[i]) for i in keep]}
+        for f in SERIES_FIELDS:
+            col = cols[f]
+            series[f] = [round(col[lo + i], 4) for i in keep]
+        out[name] = series
+    return out
+
+
+def retain_history(history: List[Dict], now: datetime, retention: timedelta = HISTORY_RETENTION) -> List[Dict]:
+    cutoff = (now - retention).timestamp()
+    out = []
+    for e in history:
+        try:
+            if _epoch(e["ts"]) >= cutoff:
+                out.append(e)
+        except (KeyError, TypeError, ValueError):
+            continue
+    return out
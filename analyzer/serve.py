@@ -0,0 +1,242 @@
+from typing import Dict, List, Optional, Tuple
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import gzip
+import hashlib
+import os
+import threading
+
+from .serialize import dumps, loads
+from .utils import parse_duration, parse_ts
+
+# Responses for the latest snapshot may be reused for this long; history
+# ranges that end before the newest point do not change and live longer
+LIVE_MAX_AGE = 60
+CLOSED_MAX_AGE = 86400
+RELOAD_INTERVAL = 1.0
+QUERY_CACHE_SIZE = 256
+# Bodies smaller than this are not worth compressing
+GZIP_MIN_BYTES = 512
+
+
+class Body:
+    """Pre-encoded response: JSON bytes, their gzip form and a strong ETag"""
+
+    __slots__ = ("raw", "gzipped", "etag", "max_age")
+
+    def __init__(self, data, max_age: int = LIVE_MAX_AGE):
+        self.raw = dumps(data)
+        self.gzipped = gzip.compress(self.raw, 6) if len(self.raw) >= GZIP_MIN_BYTES else None
+        self.etag = '"' + hashlib.blake2b(self.raw, digest_size=12).hexdigest() + '"'
+        self.max_age = max_age
+
+
+class Snapshot:
+    """Immutable in-memory view of one published feed/history pair"""
+
+    def __init__(self, feed: Dict, history: List[Tuple[float, Dict]], stamp: Tuple):
+        self.stamp = stamp
+        self.feed = Body(feed)
+        self.summary = Body({"updated_at": feed.get("updated_at"), "summary": feed.get("summary")})
+        self.windows_index = Body(feed.get("windows") or {})
+        self.windows = {name: Body(w) for name, w in (feed.get("windows") or {}).items()}
+        history = sorted(history, key=lambda e: e[0])
+        self.history_ts = [ts for ts, _ in history]
+        self.history = [entry for _, entry in history]
+        self._queries: "OrderedDict[Tuple, Body]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def history_range(self, start: Optional[float], end: Optional[float], resolution: Optional[float]) -> Body:
+        key = (start, end, resolution)
+        with self._lock:
+            body = self._queries.get(key)
+            if body is not None:
+                self._queries.move_to_end(key)
+                return body
+        lo = 0 if start is None else bisect_left(self.history_ts, start)
+        hi = len(self.history_ts) if end is None else bisect_right(self.history_ts, end)
+        points = self.history[lo:hi]
+        if resolution:
+            # Keep the last point of each resolution-sized bucket
+            out = []
+            last_bucket = None
+            for ts, entry in zip(self.history_ts[lo:hi], points):
+                bucket = int(ts // resolution)
+                if bucket == last_bucket:
+                    out[-1] = entry
+                else:
+                    out.append(entry)
+                    last_bucket = bucket
+            points = out
+        closed = end is not None and bool(self.history_ts) and end < self.history_ts[-1]
+        body = Body(points, CLOSED_MAX_AGE if closed else LIVE_MAX_AGE)
+        with self._lock:
+            self._queries[key] = body
+            if len(self._queries) > QUERY_CACHE_SIZE:
+                self._queries.popitem(last=False)
+        return body
+
+
+def _stamp(paths: List[str]) -> Tuple:
+    out = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            out.append((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            out.append(None)
+    return tuple(out)
+
+
+def load_snapshot(feed_path: str, history_path: str) -> Optional[Snapshot]:
+    stamp = _stamp([feed_path, history_path])
+    try:
+        with open(feed_path, "rb") as f:
+            feed = loads(f.read())
+    except (FileNotFoundError, ValueError):
+        return None
+    try:
+        with open(history_path, "rb") as f:
+            history = loads(f.read())
+    except (FileNotFoundError, ValueError):
+        history = feed.get("history") or []
+    entries = []
+    for e in history:
+        try:
+            entries.append((parse_ts(e["ts"]).timestamp(), e))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return Snapshot(feed, entries, stamp)
+
+
+def _parse_time(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return parse_ts(value).timestamp()
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MarketSentimentFeed"
+    # Headers and body go out in separate writes; with keep-alive, Nagle plus
+    # delayed ACKs would stall every response by ~40ms
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        snapshot: Optional[Snapshot] = self.server.snapshot
+        if snapshot is None:
+            return self._error(503, "No feed published yet")
+        parts = urlsplit(self.path)
+        path = parts.path.rstrip("/") or "/"
+        if path in ("/", "/feed", "/feed.json"):
+            return self._send(snapshot.feed)
+        if path == "/summary":
+            return self._send(snapshot.summary)
+        if path == "/windows":
+            return self._send(snapshot.windows_index)
+        if path.startswith("/windows/"):
+            body = snapshot.windows.get(path[len("/windows/"):])
+            return self._send(body) if body is not None else self._error(404, "Unknown window")
+        if path == "/history":
+            query = parse_qs(parts.query)
+            try:
+                start = _parse_time(query.get("from", [None])[0])
+                end = _parse_time(query.get("to", [None])[0])
+                resolution = query.get("resolution", [None])[0]
+                resolution = parse_duration(resolution).total_seconds() if resolution else None
+            except (ValueError, OverflowError) as e:
+                return self._error(400, str(e))
+            return self._send(snapshot.history_range(start, end, resolution))
+        return self._error(404, "Not found")
+
+    def _send(self, body: Body) -> None:
+        headers = {
+            "ETag": body.etag,
+            "Cache-Control": f"public, max-age={body.max_age}",
+            "Vary": "Accept-Encoding",
+            "Access-Control-Allow-Origin": "*",
+        }
+        if body.etag in (self.headers.get("If-None-Match") or ""):
+            self.send_response(304)
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        payload = body.raw
+        if body.gzipped is not None and "gzip" in (self.headers.get("Accept-Encoding") or ""):
+            payload = body.gzipped
+            headers["Content-Encoding"] = "gzip"
+        self.send_response(200)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _error(self, status: int, message: str) -> None:
+        payload = dumps({"error": message})
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class FeedServer(ThreadingHTTPServer):
+    """Serves the published artifacts from memory and swaps in new ones as they appear.
+
+    A reload builds a complete Snapshot off to the side and replaces the
+    reference in one assignment, so a request sees either the old or the new
+    data, never a mix.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], feed_path: str = "feed.json", history_path: str = "history.json"):
+        super().__init__(address, FeedHandler)
+        self.feed_path = feed_path
+        self.history_path = history_path
+        self.snapshot: Optional[Snapshot] = load_snapshot(feed_path, history_path)
+        self._stop = threading.Event()
+        self._watcher = threading.Thread(target=self._watch, name="feed-reload", daemon=True)
+        self._watcher.start()
+
+    def _watch(self) -> None:
+        while not self._stop.wait(RELOAD_INTERVAL):
+            self.reload()
+
+    def reload(self) -> bool:
+        current = self.snapshot
+        if current is not None and _stamp([self.feed_path, self.history_path]) == current.stamp:
+            return False
+        fresh = load_snapshot(self.feed_path, self.history_path)
+        if fresh is None:
+            # Keep serving the last good snapshot
+            return False
+        self.snapshot = fresh
+        return True
+
+    def server_close(self) -> None:
+        self._stop.set()
+        super().server_close()
+
+
+def serve(host: str = "127.0.0.1", port: int = 8787, feed_path: str = "feed.json", history_path: str = "history.json") -> None:
+    server = FeedServer((host, port), feed_path, history_path)
+    print(f"Serving {feed_path} and {history_path} on http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
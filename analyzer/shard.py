@@ -0,0 +1,389 @@
+from typing import Callable, Dict, List, NamedTuple, Optional
+from abc import ABC, abstractmethod
+import multiprocessing
+import os
+import sqlite3
+import time
+import uuid
+
+from . import sources
+from .registry import SOURCES, SourceSpec
+from .serialize import dumps_str, loads
+from .sources import FetchResult, fetch_sources
+from .utils import CACHE_DIR, latency
+
+# Work queue shared by the coordinator and its workers: "sqlite:<path>" or a plain path
+QUEUE_URL = os.getenv("FEED_QUEUE", os.path.join(CACHE_DIR, "queue.db"))
+# A claimed shard not completed within its lease goes back to the queue
+LEASE_SECONDS = float(os.getenv("FEED_SHARD_LEASE", "300"))
+MAX_ATTEMPTS = 3
+POLL_SECONDS = 0.1
+# Local workers exit once the queue has been empty this long
+WORKER_IDLE_EXIT = 1.0
+# Without local workers (--workers 0) the coordinator fetches inline only if
+# no external worker has claimed a shard of the run within this long
+INLINE_FALLBACK_SECONDS = float(os.getenv("FEED_SHARD_INLINE_AFTER", "30"))
+
+
+class Shard(NamedTuple):
+    run_id: str
+    index: int
+    # {"sources": [...], "deadline": epoch seconds or None, "validators": {...}}
+    payload: Dict
+    attempt: int
+
+
+class WorkQueue(ABC):
+    """Work queue backend interface.
+
+    A shard moves pending -> running (claimed under a lease) -> done, or back
+    to pending when its worker fails or its lease expires, until it runs out
+    of attempts (failed). Cancelled shards are never handed out again.
+    """
+
+    @abstractmethod
+    def submit(self, run_id: str, payloads: List[Dict]) -> None:
+        ...
+
+    @abstractmethod
+    def claim(self, worker: str, lease: float = LEASE_SECONDS, run_id: Optional[str] = None) -> Optional[Shard]:
+        ...
+
+    @abstractmethod
+    def complete(self, shard: Shard, result: Dict) -> bool:
+        ...
+
+    @abstractmethod
+    def fail(self, shard: Shard, error: str) -> bool:
+        ...
+
+    @abstractmethod
+    def states(self, run_id: str) -> Dict[int, str]:
+        ...
+
+    @abstractmethod
+    def results(self, run_id: str) -> Dict[int, Dict]:
+        ...
+
+    @abstractmethod
+    def cancel(self, run_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def purge(self, run_id: str) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shards (
+    run_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    result TEXT,
+    error TEXT,
+    PRIMARY KEY (run_id, idx)
+);
+CREATE INDEX IF NOT EXISTS shards_state ON shards (state, run_id, idx);
+"""
+
+
+class SQLiteQueue(WorkQueue):
+    """Queue in a local SQLite file (WAL); any process that can open it can work"""
+
+    def __init__(self, path: str):
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def submit(self, run_id: str, payloads: List[Dict]) -> None:
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.executemany(
+            "INSERT INTO shards (run_id, idx, payload, state) VALUES (?, ?, ?, 'pending')",
+            [(run_id, i, dumps_str(p)) for i, p in enumerate(payloads)],
+        )
+        self.conn.execute("COMMIT")
+
+    def claim(self, worker: str, lease: float = LEASE_SECONDS, run_id: Optional[str] = None) -> Optional[Shard]:
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute(
+                "UPDATE shards SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,"
+                " error = 'lease expired' WHERE state = 'running' AND lease_until < ?",
+                (MAX_ATTEMPTS, now),
+            )
+            query = "SELECT run_id, idx, payload, attempts FROM shards WHERE state = 'pending'"
+            params: tuple = ()
+            if run_id is not None:
+                query += " AND run_id = ?"
+                params = (run_id,)
+            row = self.conn.execute(query + " ORDER BY run_id, idx LIMIT 1", params).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE shards SET state = 'running', attempts = attempts + 1, worker = ?, lease_until = ?"
+                    " WHERE run_id = ? AND idx = ?",
+                    (worker, now + lease, row[0], row[1]),
+                )
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+        if row is None:
+            return None
+        return Shard(row[0], row[1], loads(row[2]), row[3] + 1)
+
+    def _finish(self, shard: Shard, state_sql: str, params: tuple) -> bool:
+        # Only the current claim may finish a shard; a worker whose lease expired
+        # and was re-claimed elsewhere is ignored
+        cur = self.conn.execute(
+            f"UPDATE shards SET {state_sql}, lease_until = NULL"
+            " WHERE run_id = ? AND idx = ? AND state = 'running' AND attempts = ?",
+            params + (shard.run_id, shard.index, shard.attempt),
+        )
+        return cur.rowcount == 1
+
+    def complete(self, shard: Shard, result: Dict) -> bool:
+        return self._finish(shard, "state = 'done', result = ?", (dumps_str(result),))
+
+    def fail(self, shard: Shard, error: str) -> bool:
+        return self._finish(
+            shard,
+            "state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, error = ?",
+            (MAX_ATTEMPTS, error),
+        )
+
+    def states(self, run_id: str) -> Dict[int, str]:
+        return dict(self.conn.execute("SELECT idx, state FROM shards WHERE run_id = ?", (run_id,)))
+
+    def results(self, run_id: str) -> Dict[int, Dict]:
+        rows = self.conn.execute("SELECT idx, result FROM shards WHERE run_id = ? AND state = 'done'", (run_id,))
+        return {idx: loads(result) for idx, result in rows}
+
+    def cancel(self, run_id: str) -> None:
+        self.conn.execute(
+            "UPDATE shards SET state = 'cancelled' WHERE run_id = ? AND state IN ('pending', 'running')",
+            (run_id,),
+        )
+
+    def purge(self, run_id: str) -> None:
+        self.conn.execute("DELETE FROM shards WHERE run_id = ?", (run_id,))
+
+
+# URL scheme -> backend; other queues (Redis, SQS, ...) register here
+QUEUE_BACKENDS: Dict[str, Callable[[str], WorkQueue]] = {
+    "sqlite": SQLiteQueue,
+}
+
+
+def open_queue(url: Optional[str] = None) -> WorkQueue:
+    url = url or QUEUE_URL
+    scheme, sep, rest = url.partition(":")
+    if sep and scheme in QUEUE_BACKENDS:
+        return QUEUE_BACKENDS[scheme](rest)
+    return SQLiteQueue(url)
+
+
+def plan_shards(specs: List[SourceSpec], shards: int) -> List[List[str]]:
+    """Round-robin in registry order, so the heavy RSS feeds spread evenly"""
+    out: List[List[str]] = [[] for _ in range(max(1, min(shards, len(specs))))]
+    for i, spec in enumerate(specs):
+        out[i % len(out)].append(spec.name)
+    return out
+
+
+def fetch_shard(payload: Dict) -> Dict:
+    """Fetch one shard's sources with the validators that travel with it, so
+    workers keep no state of their own"""
+    names = payload["sources"]
+    by_name = {spec.name: spec for spec in SOURCES}
+    specs = [by_name[n] for n in names if n in by_name]
+    deadline = payload.get("deadline")
+    if deadline is not None:
+        deadline = time.monotonic() + (deadline - time.time())
+    previous = dict(sources.headers_cache)
+    sources.use_headers_cache(payload.get("validators") or {})
+    mark = latency.mark()
+    try:
+        result = fetch_sources(deadline, persist_headers=False, specs=specs)
+        validators = sources.validators_for(names)
+        samples = latency.since(mark)
+    finally:
+        # The coordinator fetches inline too; its own cache must survive
+        sources.use_headers_cache(previous)
+    return {
+        "items": result.items,
+        "missing": result.missing,
+        # Unknown to this worker's registry counts as failed
+        "failed": result.failed + [n for n in names if n not in by_name],
+        "errors": {**result.errors, **{n: "unknown source" for n in names if n not in by_name}},
+        "validators": validators,
+        # Request latencies, so the coordinator's hedging threshold learns from them
+        "latency": samples,
+    }
+
+
+def work(queue: WorkQueue, worker: Optional[str] = None, idle_exit: Optional[float] = None) -> int:
+    """Claim and fetch shards until the queue stays empty for idle_exit seconds
+    (forever if None); returns the number of shards processed"""
+    worker = worker or f"{os.uname().nodename}:{os.getpid()}"
+    done = 0
+    idle_since = time.monotonic()
+    while True:
+        shard = queue.claim(worker)
+        if shard is None:
+            if idle_exit is not None and time.monotonic() - idle_since >= idle_exit:
+                return done
+            time.sleep(POLL_SECONDS)
+            continue
+        try:
+            result = fetch_shard(shard.payload)
+        except Exception as e:
+            queue.fail(shard, f"{type(e).__name__}: {e}")
+        else:
+            queue.complete(shard, result)
+        done += 1
+        idle_since = time.monotonic()
+
+
+def _worker_main(url: str, worker: str) -> None:
+    queue = open_queue(url)
+    try:
+        work(queue, worker, idle_exit=WORKER_IDLE_EXIT)
+    finally:
+        queue.close()
+
+
+def merge_results(specs: List[SourceSpec], plan: List[List[str]], results: Dict[int, Dict], states: Dict[int, str]) -> FetchResult:
+    """Combine shard results into what a single-process fetch_sources would return.
+
+    Items are ordered by registry position of their source, then as the source
+    returned them, and de-duplicated by URL, so the result does not depend on
+    which worker finished first. Sources of shards that ran out of attempts
+    are failed; those of shards still open (cancelled at the deadline) missing.
+    """
+    order = {spec.name: i for i, spec in enumerate(specs)}
+    merged = FetchResult([], [], [], {})
+    collected = []
+    for idx in sorted(results):
+        res = results[idx]
+        collected.extend(res.get("items") or [])
+        merged.missing.extend(res.get("missing") or [])
+        merged.failed.extend(res.get("failed") or [])
+        merged.errors.update(res.get("errors") or {})
+    for idx, state in states.items():
+        if state == "failed":
+            merged.failed.extend(plan[idx])
+            for name in plan[idx]:
+                merged.errors[name] = "shard failed on every attempt"
+        elif state != "done":
+            merged.missing.extend(plan[idx])
+    collected.sort(key=lambda it: order.get(it.get("source"), len(order)))
+    seen = set()
+    for it in collected:
+        url = it.get("url")
+        if url:
+            if url in seen:
+                continue
+            seen.add(url)
+        merged.items.append(it)
+    merged.missing.sort(key=lambda n: order.get(n, len(order)))
+    merged.failed.sort(key=lambda n: order.get(n, len(order)))
+    return merged
+
+
+def fetch_sharded(
+    specs: List[SourceSpec],
+    shards: int,
+    deadline: Optional[float] = None,
+    workers: Optional[int] = None,
+    queue_url: Optional[str] = None,
+    persist_headers: bool = True,
+) -> FetchResult:
+    """Coordinator: split specs into shards, let workers fetch them, merge.
+
+    `workers` local processes are started (default: one per shard); more can
+    join from anywhere via `cli.py worker`. The coordinator fetches remaining
+    shards itself once the local workers it started have all exited or, with
+    workers=0, when no worker has claimed a shard within
+    INLINE_FALLBACK_SECONDS. deadline is on the
+    time.monotonic() clock; shards unfinished by then are cancelled and their
+    sources reported missing. Shards whose worker fails are re-queued up to
+    MAX_ATTEMPTS times, then reported failed.
+    """
+    if not specs:
+        return FetchResult([], [], [], {})
+    url = queue_url or QUEUE_URL
+    plan = plan_shards(specs, shards)
+    expires = None if deadline is None else time.time() + (deadline - time.monotonic())
+    payloads = [{"sources": names, "deadline": expires, "validators": sources.validators_for(names)} for names in plan]
+    run_id = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+    queue = open_queue(url)
+    procs = []
+    inline = set()
+    claimed = False
+    cancelled = False
+    started = time.monotonic()
+    try:
+        queue.submit(run_id, payloads)
+        ctx = multiprocessing.get_context("spawn")
+        for i in range(len(plan) if workers is None else workers):
+            proc = ctx.Process(target=_worker_main, args=(url, f"{run_id}/{i}"), daemon=True)
+            proc.start()
+            procs.append(proc)
+        while True:
+            states = queue.states(run_id)
+            if all(s in ("done", "failed") for s in states.values()):
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                queue.cancel(run_id)
+                cancelled = True
+                break
+            # Claims other than our own inline ones come from a worker
+            claimed = claimed or any(s != "pending" for i, s in states.items() if i not in inline)
+            if procs:
+                fallback = not any(p.is_alive() for p in procs)
+            else:
+                fallback = not claimed and time.monotonic() - started >= INLINE_FALLBACK_SECONDS
+            if fallback:
+                shard = queue.claim(f"{run_id}/coordinator", run_id=run_id)
+                if shard is not None:
+                    inline.add(shard.index)
+                    try:
+                        queue.complete(shard, fetch_shard(shard.payload))
+                    except Exception as e:
+                        queue.fail(shard, f"{type(e).__name__}: {e}")
+                    continue
+            time.sleep(POLL_SECONDS)
+        results = queue.results(run_id)
+        merged = merge_results(specs, plan, results, queue.states(run_id))
+        for idx, res in results.items():
+            sources.update_headers_cache(res.get("validators") or {})
+            if idx not in inline:
+                # Shards fetched inline already recorded into this process
+                latency.extend(res.get("latency") or {})
+        queue.purge(run_id)
+    finally:
+        for proc in procs:
+            # Past the deadline nothing they return is used any more
+            proc.join(timeout=0 if cancelled else WORKER_IDLE_EXIT + 1.0)
+            if proc.is_alive():
+                proc.terminate()
+        queue.close()
+    if persist_headers:
+        sources.persist_headers_cache()
+    return merged
@@ -1,9 +1,13 @@
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timezone
 import os
+import time
 import feedparser
 
-from .utils import http_get, normalize_url, utcnow, load_headers_cache, save_headers_cache
+from .registry import SOURCES, SourceSpec
+from .serialize import loads
+from .utils import DeadlineExceeded, http_get, normalize_url, utcnow, load_headers_cache, save_headers_cache, set_deadline
 
 CRYPTOPANIC_TOKEN = os.getenv("CRYPTOPANIC_TOKEN")
 ETHERSCAN_API_KEY = os.getenv("ETHERSCAN_API_KEY")
@@ -12,9 +16,42 @@ ETHERSCAN_API_KEY = os.getenv("ETHERSCAN_API_KEY")
 # category in {"crypto", "global", "social"}
 
 headers_cache = load_headers_cache()
+# Validators changed during this run; written once by fetch_all_sources
+_headers_dirty = False
 
 
-def fetch_rss(url: str, source_name: str, category: str) -> List[Dict]:
+def use_headers_cache(data: Dict[str, Dict[str, str]]) -> None:
+	# Swap in validators from another backend (e.g. the SQLite store)
+	global _headers_dirty
+	headers_cache.clear()
+	headers_cache.update(data)
+	_headers_dirty = False
+
+
+def validators_for(names: List[str]) -> Dict[str, Dict[str, str]]:
+	"""Cached validators of the named sources (keys are "<source>:<url>")"""
+	wanted = set(names)
+	return {k: v for k, v in headers_cache.items() if k.split(":", 1)[0] in wanted}
+
+
+def update_headers_cache(data: Dict[str, Dict[str, str]]) -> None:
+	# Fold in validators refreshed elsewhere, e.g. by shard workers
+	global _headers_dirty
+	if data:
+		headers_cache.update(data)
+		_headers_dirty = True
+
+
+def persist_headers_cache() -> None:
+	global _headers_dirty
+	if _headers_dirty:
+		# Copy: an abandoned fetch may still be updating validators
+		save_headers_cache(dict(headers_cache))
+		_headers_dirty = False
+
+
+def fetch_rss(url: str, source_name: str, category: str, max_entries: int = 75) -> List[Dict]:
+	global _headers_dirty
 	cond_headers = {}
 	cache_key = f"{source_name}:{url}"
 	cached = headers_cache.get(cache_key, {})
@@ -33,13 +70,13 @@ def fetch_rss(url: str, source_name: str, category: str) -> List[Dict]:
 		new_cache["ETag"] = resp_headers["ETag"]
 	if "Last-Modified" in resp_headers:
 		new_cache["Last-Modified"] = resp_headers["Last-Modified"]
-	if new_cache:
+	if new_cache and new_cache != cached:
 		headers_cache[cache_key] = new_cache
-		save_headers_cache(headers_cache)
+		_headers_dirty = True
 
 	parsed = feedparser.parse(content)
 	items: List[Dict] = []
-	for e in parsed.entries[:75]:
+	for e in parsed.entries[:max_entries]:
 		link = normalize_url(getattr(e, "link", ""))
 		title = getattr(e, "title", "")
 		desc = getattr(e, "summary", None) or getattr(e, "description", None) or ""
@@ -61,78 +98,14 @@ def fetch_rss(url: str, source_name: str, category: str) -> List[Dict]:
 	return items
 
 
-def fetch_coindesk() -> List[Dict]:
-	try:
-		return fetch_rss("https://www.coindesk.com/arc/outboundfeeds/rss/", "CoinDesk", "crypto")
-	except Exception:
-		return []
-
-
-def fetch_cointelegraph() -> List[Dict]:
-	try:
-		return fetch_rss("https://cointelegraph.com/rss", "CoinTelegraph", "crypto")
-	except Exception:
-		return []
-
-
-def fetch_reuters_markets() -> List[Dict]:
-	try:
-		return fetch_rss("https://feeds.reuters.com/reuters/marketsNews", "Reuters Markets", "global")
-	except Exception:
-		return []
-
-
-def fetch_bloomberg_markets() -> List[Dict]:
-	try:
-		return fetch_rss("https://feeds.bloomberg.com/markets/news.rss", "Bloomberg Markets", "global")
-	except Exception:
-		return []
-
-
-def fetch_cnbc_markets() -> List[Dict]:
-	try:
-		return fetch_rss("https://www.cnbc.com/id/100003114/device/rss/rss.html", "CNBC Markets", "global")
-	except Exception:
-		return []
-
-
-def fetch_marketwatch() -> List[Dict]:
-	try:
-		return fetch_rss("https://feeds.content.dowjones.io/public/rss/mw_realtimeheadlines", "MarketWatch", "global")
-	except Exception:
-		return []
-
-
-def fetch_yahoo_finance() -> List[Dict]:
-	try:
-		return fetch_rss("https://feeds.finance.yahoo.com/rss/2.0/headline?s=^DJI,^GSPC,^IXIC&region=US&lang=en-US", "Yahoo Finance", "global")
-	except Exception:
-		return []
-
-
-def fetch_decrypt() -> List[Dict]:
-	try:
-		return fetch_rss("https://decrypt.co/feed", "Decrypt", "crypto")
-	except Exception:
-		return []
-
-
-def fetch_cryptoslate() -> List[Dict]:
-	try:
-		return fetch_rss("https://cryptoslate.com/feed/", "CryptoSlate", "crypto")
-	except Exception:
-		return []
-
-
-def fetch_crypto_panic() -> List[Dict]:
+def fetch_crypto_panic(max_entries: int = 100, category: str = "crypto") -> List[Dict]:
 	if not CRYPTOPANIC_TOKEN:
 		return []
 	url = f"https://cryptopanic.com/api/v1/posts/?token={CRYPTOPANIC_TOKEN}&filter=rising"
 	status, headers, content = http_get(url)
-	import json
-	data = json.loads(content.decode("utf-8"))
+	data = loads(content)
 	items: List[Dict] = []
-	for p in data.get("results", [])[:100]:
+	for p in data.get("results", [])[:max_entries]:
 		link = normalize_url(p.get("url") or "")
 		title = p.get("title") or ""
 		published_raw = p.get("published_at") or p.get("created_at")
@@ -144,51 +117,71 @@ def fetch_crypto_panic() -> List[Dict]:
 			"url": link,
 			"source": "CryptoPanic",
 			"published_at": (published_raw or utcnow().isoformat()),
-			"category": "social" if p.get("source", {}).get("domain") in {"twitter.com", "x.com"} else "crypto",
+			"category": "social" if p.get("source", {}).get("domain") in {"twitter.com", "x.com"} else category,
 		})
 	return items
 
 # Market indicators
 
-def fetch_binance_tickers(symbols: List[str] = ["BTCUSDT", "ETHUSDT", "SOLUSDT"]) -> List[Dict]:
+TICKER_SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
+FUNDING_SYMBOLS = ["BTCUSDT", "ETHUSDT"]
+
+
+def ticker_item(sym: str, pct: float, published: datetime, category: str = "crypto") -> Dict:
+	name = sym.replace("USDT", "")
+	if pct >= 2.0:
+		title = f"{name} up {pct:.1f}% 24h — rally"
+	elif pct <= -2.0:
+		title = f"{name} down {pct:.1f}% 24h — plunge"
+	else:
+		title = f"{name} {pct:+.1f}% 24h"
+	return {
+		"title": title,
+		"url": f"https://www.binance.com/en/trade/{name}_USDT",
+		"source": "Binance 24h",
+		"published_at": published.isoformat(),
+		"category": category,
+		"snapshot": True,
+	}
+
+
+def funding_item(sym: str, rate: float, published: datetime, category: str = "crypto") -> Dict:
+	# rate in percent
+	name = sym.replace("USDT", "")
+	return {
+		"title": f"{name} funding {rate:+.3f}%",
+		"url": f"https://www.binance.com/en/futures/{name}USDT",
+		"source": "Binance Funding",
+		"published_at": published.isoformat(),
+		"category": category,
+		"snapshot": True,
+	}
+
+
+def fetch_binance_tickers(symbols: List[str] = TICKER_SYMBOLS, category: str = "crypto") -> List[Dict]:
 	items: List[Dict] = []
 	for sym in symbols:
 		try:
 			status, headers, content = http_get(f"https://api.binance.com/api/v3/ticker/24hr?symbol={sym}")
 			if status != 200:
 				continue
-			import json
-			data = json.loads(content.decode("utf-8"))
+			data = loads(content)
 			pct = float(data.get("priceChangePercent", 0.0))
 			close_time = int(data.get("closeTime", 0)) / 1000.0
 			published = datetime.fromtimestamp(close_time, tz=timezone.utc) if close_time else utcnow()
-			name = sym.replace("USDT", "")
-			if pct >= 2.0:
-				title = f"{name} up {pct:.1f}% 24h — rally"
-			elif pct <= -2.0:
-				title = f"{name} down {pct:.1f}% 24h — plunge"
-			else:
-				title = f"{name} {pct:+.1f}% 24h"
-			items.append({
-				"title": title,
-				"url": f"https://www.binance.com/en/trade/{name}_USDT",
-				"source": "Binance 24h",
-				"published_at": published.isoformat(),
-				"category": "crypto",
-			})
+			items.append(ticker_item(sym, pct, published, category))
 		except Exception:
 			continue
 	return items
 
 
-def fetch_coingecko_global() -> List[Dict]:
+def fetch_coingecko_global(category: str = "crypto") -> List[Dict]:
 	# Global market cap % change
 	try:
 		status, headers, content = http_get("https://api.coingecko.com/api/v3/global")
 		if status != 200:
 			return []
-		import json
-		data = json.loads(content.decode("utf-8"))
+		data = loads(content)
 		chg = (data.get("data", {}).get("market_cap_change_percentage_24h_usd") or 0.0)
 		published = utcnow()
 		if chg >= 1.0:
@@ -202,19 +195,19 @@ def fetch_coingecko_global() -> List[Dict]:
 			"url": "https://www.coingecko.com/en/global_charts",
 			"source": "CoinGecko Global",
 			"published_at": published.isoformat(),
-			"category": "crypto",
+			"category": category,
+			"snapshot": True,
 		}]
 	except Exception:
 		return []
 
 
-def fetch_fear_greed() -> List[Dict]:
+def fetch_fear_greed(category: str = "crypto") -> List[Dict]:
 	try:
 		status, headers, content = http_get("https://api.alternative.me/fng/?limit=1&format=json")
 		if status != 200:
 			return []
-		import json
-		data = json.loads(content.decode("utf-8"))
+		data = loads(content)
 		res = (data.get("data") or [])[0] if data.get("data") else None
 		if not res:
 			return []
@@ -232,20 +225,20 @@ def fetch_fear_greed() -> List[Dict]:
 			"url": "https://alternative.me/crypto/fear-and-greed-index/",
 			"source": "Fear&Greed",
 			"published_at": published.isoformat(),
-			"category": "crypto",
+			"category": category,
+			"snapshot": True,
 		}]
 	except Exception:
 		return []
 
 
-def fetch_etherscan_gas() -> List[Dict]:
+def fetch_etherscan_gas(category: str = "crypto") -> List[Dict]:
 	if not ETHERSCAN_API_KEY:
 		return []
 	status, headers, content = http_get(f"https://api.etherscan.io/api?module=gastracker&action=gasoracle&apikey={ETHERSCAN_API_KEY}")
 	if status != 200:
 		return []
-	import json
-	data = json.loads(content.decode("utf-8")).get("result", {})
+	data = loads(content).get("result", {})
 	try:
 		propose = float(data.get("ProposeGasPrice"))
 		published = utcnow()
@@ -256,52 +249,86 @@ def fetch_etherscan_gas() -> List[Dict]:
 			"url": "https://etherscan.io/gastracker",
 			"source": "Etherscan Gas",
 			"published_at": published.isoformat(),
-			"category": "crypto",
+			"category": category,
+			"snapshot": True,
 		}]
 	except Exception:
 		return []
 
 
-def fetch_binance_funding(symbols: List[str] = ["BTCUSDT", "ETHUSDT"]) -> List[Dict]:
+def fetch_binance_funding(symbols: List[str] = FUNDING_SYMBOLS, category: str = "crypto") -> List[Dict]:
 	items: List[Dict] = []
 	for sym in symbols:
 		status, headers, content = http_get(f"https://fapi.binance.com/fapi/v1/premiumIndex?symbol={sym}")
 		if status != 200:
 			continue
-		import json
-		data = json.loads(content.decode("utf-8"))
+		data = loads(content)
 		try:
 			rate = float(data.get("lastFundingRate", 0.0)) * 100.0
-			published = utcnow()
-			name = sym.replace("USDT", "")
-			title = f"{name} funding {rate:+.3f}%"
-			items.append({
-				"title": title,
-				"url": f"https://www.binance.com/en/futures/{name}USDT",
-				"source": "Binance Funding",
-				"published_at": published.isoformat(),
-				"category": "crypto",
-			})
+			items.append(funding_item(sym, rate, utcnow(), category))
 		except Exception:
 			continue
 	return items
 
 
-def fetch_all_sources() -> List[Dict]:
-	items: List[Dict] = []
-	items.extend(fetch_coindesk())
-	items.extend(fetch_cointelegraph())
-	items.extend(fetch_reuters_markets())
-	items.extend(fetch_bloomberg_markets())
-	items.extend(fetch_cnbc_markets())
-	items.extend(fetch_marketwatch())
-	items.extend(fetch_yahoo_finance())
-	items.extend(fetch_decrypt())
-	items.extend(fetch_cryptoslate())
-	items.extend(fetch_binance_tickers())
-	items.extend(fetch_coingecko_global())
-	items.extend(fetch_fear_greed())
-	items.extend(fetch_etherscan_gas())
-	items.extend(fetch_crypto_panic())
-	items.extend(fetch_binance_funding())
-	return items 
\ No newline at end of file
+# Registry parser name -> fetcher taking the source's spec; every fetcher
+# tags its items with the spec's category
+PARSERS: Dict[str, Callable[[SourceSpec], List[Dict]]] = {
+	"rss": lambda spec: fetch_rss(spec.url, spec.name, spec.category, spec.max_entries),
+	"cryptopanic": lambda spec: fetch_crypto_panic(spec.max_entries, spec.category),
+	"binance_tickers": lambda spec: fetch_binance_tickers(spec.params.get("symbols", TICKER_SYMBOLS), spec.category),
+	"binance_funding": lambda spec: fetch_binance_funding(spec.params.get("symbols", FUNDING_SYMBOLS), spec.category),
+	"coingecko_global": lambda spec: fetch_coingecko_global(spec.category),
+	"fear_greed": lambda spec: fetch_fear_greed(spec.category),
+	"etherscan_gas": lambda spec: fetch_etherscan_gas(spec.category),
+}
+FETCH_WORKERS = int(os.getenv("FEED_FETCH_WORKERS", "8"))
+
+
+class FetchResult(NamedTuple):
+	items: List[Dict]
+	# Still running when the deadline passed
+	missing: List[str]
+	# Raised an error
+	failed: List[str]
+	# Failed source name -> "ExceptionType: message"
+	errors: Dict[str, str]
+
+
+def fetch_sources(deadline: Optional[float] = None, persist_headers: bool = True, specs: Optional[List[SourceSpec]] = None) -> FetchResult:
+	"""Run the registry's fetchers (or just `specs`) concurrently.
+
+	deadline is on the time.monotonic() clock. Requests still running when it
+	passes are abandoned (utils.http_get stops at the same deadline) and the
+	items that did arrive are returned in registry order.
+	"""
+	specs = SOURCES if specs is None else specs
+	set_deadline(deadline)
+	pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="fetch")
+	try:
+		futures = [(spec.name, pool.submit(PARSERS[spec.parser], spec)) for spec in specs]
+		timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+		wait([f for _, f in futures], timeout=timeout)
+	finally:
+		pool.shutdown(wait=False, cancel_futures=True)
+
+	result = FetchResult([], [], [], {})
+	for name, fut in futures:
+		if not fut.done() or fut.cancelled():
+			result.missing.append(name)
+		elif isinstance(fut.exception(), DeadlineExceeded):
+			# Cut off by the run deadline, same as a fetch still running
+			result.missing.append(name)
+		elif fut.exception() is not None:
+			exc = fut.exception()
+			result.failed.append(name)
+			result.errors[name] = f"{type(exc).__name__}: {exc}"
+		else:
+			result.items.extend(fut.result())
+	if persist_headers:
+		persist_headers_cache()
+	return result
+
+
+def fetch_all_sources(persist_headers: bool = True) -> List[Dict]:
+	return fetch_sources(persist_headers=persist_headers).items
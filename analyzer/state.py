@@ -0,0 +1,189 @@
+from typing import Dict, Iterator, List, Optional
+from contextlib import contextmanager
+from datetime import datetime
+import os
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: writers are not serialized
+    fcntl = None
+
+from .seen import SEEN_FILTER_PATH, SeenFilter, load_seen_filter, series_key
+from .serialize import load_cache, save_cache
+from .utils import CACHE_DIR, DEFAULT_HALF_LIFE_HOURS, parse_ts
+
+DECAY_STATE_PATH = os.path.join(CACHE_DIR, "decay_state.json")
+
+# Every Nth run the accumulators are checked against a full recompute
+FULL_RECOMPUTE_EVERY = 24
+DRIFT_TOLERANCE = 0.05
+# Accumulators decayed below this weight are dropped
+MIN_WEIGHT = 1e-6
+
+
+def live_key(item: Dict) -> str:
+    """Live slot of a snapshot item (per source and seen.series_key), shared by
+    the batch run and the stream"""
+    return f"{item.get('source')}:{series_key(item)}"
+
+
+class DecayedAccumulator:
+    """Running Σw·s, Σw and item count under exponential decay"""
+
+    __slots__ = ("sw", "sws", "n")
+
+    def __init__(self, sw: float = 0.0, sws: float = 0.0, n: float = 0.0):
+        self.sw = sw
+        self.sws = sws
+        self.n = n
+
+    def scale(self, factor: float) -> None:
+        self.sw *= factor
+        self.sws *= factor
+        self.n *= factor
+
+    def add(self, s: float, w: float) -> None:
+        self.sw += w
+        self.sws += s * w
+        self.n += 1.0
+
+    @property
+    def mean(self) -> float:
+        return self.sws / self.sw if self.sw else 0.0
+
+    def to_list(self) -> List[float]:
+        return [self.sw, self.sws, self.n]
+
+
+class DecayedState:
+    """Decayed sentiment sums per bucket and per source, rolled forward across runs.
+
+    Advancing the clock by Δt multiplies every sum by 0.5^(Δt / half-life), so a
+    run only has to add the items it has not ingested before.
+    """
+
+    def __init__(
+        self,
+        as_of: Optional[datetime] = None,
+        buckets: Optional[Dict[str, DecayedAccumulator]] = None,
+        sources: Optional[Dict[str, DecayedAccumulator]] = None,
+        seen: Optional[SeenFilter] = None,
+        runs_since_full: int = 0,
+        half_life_hours: float = DEFAULT_HALF_LIFE_HOURS,
+        live: Optional[Dict[str, List]] = None,
+    ):
+        self.as_of = as_of
+        self.buckets = buckets or {}
+        self.sources = sources or {}
+        # Streamed contributions that are replaced rather than added: key -> [bucket, source, s, w]
+        self.live = live or {}
+        # Keys (seen.item_key) of ingested items, so items still listed by a feed are not added twice
+        self.seen = seen if seen is not None else SeenFilter()
+        self.runs_since_full = runs_since_full
+        self.half_life_hours = half_life_hours
+
+    def advance(self, now: datetime) -> None:
+        if self.as_of is not None and now > self.as_of:
+            hours = (now - self.as_of).total_seconds() / 3600.0
+            factor = 0.5 ** (hours / self.half_life_hours)
+            for accs in (self.buckets, self.sources):
+                for key in list(accs):
+                    accs[key].scale(factor)
+                    if accs[key].sw < MIN_WEIGHT:
+                        del accs[key]
+            for key in list(self.live):
+                self.live[key][3] *= factor
+                if self.live[key][3] < MIN_WEIGHT:
+                    del self.live[key]
+        if self.as_of is None or now > self.as_of:
+            self.as_of = now
+
+    def is_new(self, key: Optional[str]) -> bool:
+        return bool(key) and key not in self.seen
+
+    def mark_seen(self, key: str) -> None:
+        self.seen.add(key)
+
+    def add(self, bucket: str, source: Optional[str], s: float, w: float) -> None:
+        # w is the item's weight as of self.as_of, freshness decay included
+        self.buckets.setdefault(bucket, DecayedAccumulator()).add(s, w)
+        self.sources.setdefault(source or "unknown", DecayedAccumulator()).add(s, w)
+
+    def set_live(self, key: str, bucket: str, source: Optional[str], s: float, w: float) -> None:
+        """Replace the live contribution stored under key (e.g. a streamed ticker)"""
+        self.drop_live(key)
+        self.add(bucket, source, s, w)
+        self.live[key] = [bucket, source, s, w]
+
+    def drop_live(self, key: str) -> None:
+        previous = self.live.pop(key, None)
+        if previous is None:
+            return
+        bucket, source, s, w = previous
+        for acc in (self.buckets.get(bucket), self.sources.get(source or "unknown")):
+            if acc is not None:
+                acc.sw = max(0.0, acc.sw - w)
+                acc.sws -= s * w
+                acc.n = max(0.0, acc.n - 1.0)
+
+    def to_dict(self) -> Dict:
+        return {
+            "as_of": self.as_of.isoformat() if self.as_of else None,
+            "half_life_hours": self.half_life_hours,
+            "runs_since_full": self.runs_since_full,
+            "buckets": {k: v.to_list() for k, v in self.buckets.items()},
+            "sources": {k: v.to_list() for k, v in self.sources.items()},
+            "live": self.live,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, seen: Optional[SeenFilter] = None) -> "DecayedState":
+        return cls(
+            as_of=parse_ts(data["as_of"]) if data.get("as_of") else None,
+            buckets={k: DecayedAccumulator(*v) for k, v in (data.get("buckets") or {}).items()},
+            sources={k: DecayedAccumulator(*v) for k, v in (data.get("sources") or {}).items()},
+            seen=seen,
+            runs_since_full=int(data.get("runs_since_full", 0)),
+            half_life_hours=float(data.get("half_life_hours", DEFAULT_HALF_LIFE_HOURS)),
+            live={k: list(v) for k, v in (data.get("live") or {}).items()},
+        )
+
+
+def load_decayed_state(path: str = DECAY_STATE_PATH, seen_path: str = SEEN_FILTER_PATH) -> DecayedState:
+    seen = load_seen_filter(seen_path)
+    data = load_cache(path)
+    if not data:
+        return DecayedState(seen=seen)
+    try:
+        return DecayedState.from_dict(data, seen)
+    except (KeyError, TypeError, ValueError):
+        return DecayedState(seen=seen)
+
+
+def save_decayed_state(state: DecayedState, path: str = DECAY_STATE_PATH, seen_path: str = SEEN_FILTER_PATH) -> None:
+    save_cache(path, state.to_dict())
+    state.seen.save(seen_path)
+
+
+@contextmanager
+def state_lock(path: str = DECAY_STATE_PATH, blocking: bool = True) -> Iterator[bool]:
+    """Advisory lock serializing writers of the decayed state (batch run vs. stream).
+
+    Yields whether the lock is held; with blocking=False it may not be.
+    """
+    if fcntl is None:
+        yield True
+        return
+    dirname = os.path.dirname(path)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    with open(path + ".lock", "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
@@ -0,0 +1,174 @@
+from typing import Dict, Iterator, List, Optional
+from contextlib import contextmanager
+from datetime import datetime
+import os
+import sqlite3
+
+from .archive import item_hash
+from .serialize import dumps_str, loads
+from .utils import parse_ts, save_json, utcnow
+
+STORE_PATH = os.getenv("FEED_DB")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    url_hash TEXT PRIMARY KEY,
+    ts REAL NOT NULL,
+    source TEXT,
+    category TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_ts ON items (ts);
+CREATE INDEX IF NOT EXISTS items_source_ts ON items (source, ts);
+
+CREATE TABLE IF NOT EXISTS history (
+    ts REAL PRIMARY KEY,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS validators (
+    key TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS snapshots (
+    name TEXT PRIMARY KEY,
+    updated_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+"""
+
+
+class Store:
+    """Embedded SQLite (WAL) store for items, history points and HTTP validators.
+
+    The public JSON files are export views written from it, so a run touches
+    only the rows it changes instead of re-serializing whole files.
+    """
+
+    def __init__(self, path: str):
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    @contextmanager
+    def transaction(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def is_empty(self) -> bool:
+        return not any(
+            self.conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone()
+            for table in ("items", "history", "validators", "snapshots")
+        )
+
+    # Items
+
+    def put_items(self, items: List[Dict]) -> int:
+        rows = []
+        for it in items:
+            if not it.get("url"):
+                continue
+            published = it.get("published_at")
+            ts = parse_ts(published).timestamp() if isinstance(published, str) else utcnow().timestamp()
+            rows.append((item_hash(it), ts, it.get("source"), it.get("category"), dumps_str(it)))
+        before = self.conn.total_changes
+        self.conn.executemany("INSERT OR IGNORE INTO items VALUES (?, ?, ?, ?, ?)", rows)
+        return self.conn.total_changes - before
+
+    def iter_items(self, start: datetime, end: datetime, sources: Optional[List[str]] = None) -> Iterator[Dict]:
+        query = "SELECT data FROM items WHERE ts BETWEEN ? AND ?"
+        params: list = [start.timestamp(), end.timestamp()]
+        if sources is not None:
+            query += f" AND source IN ({','.join('?' * len(sources))})"
+            params.extend(sources)
+        for (data,) in self.conn.execute(query + " ORDER BY ts", params):
+            yield loads(data)
+
+    # History
+
+    def put_history(self, entries: List[Dict]) -> None:
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO history VALUES (?, ?)",
+            [(parse_ts(e["ts"]).timestamp(), dumps_str(e)) for e in entries],
+        )
+
+    def load_history(self, limit: Optional[int] = None, since: Optional[datetime] = None) -> List[Dict]:
+        query, params = "SELECT data FROM history", []
+        if since is not None:
+            query += " WHERE ts >= ?"
+            params.append(since.timestamp())
+        if limit is None:
+            rows = self.conn.execute(query + " ORDER BY ts", params).fetchall()
+        else:
+            rows = self.conn.execute(query + " ORDER BY ts DESC LIMIT ?", params + [limit]).fetchall()[::-1]
+        return [loads(data) for (data,) in rows]
+
+    # HTTP validators
+
+    def put_validators(self, validators: Dict[str, Dict[str, str]]) -> None:
+        now = utcnow().isoformat()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO validators VALUES (?, ?, ?, ?)",
+            [(key, v.get("ETag"), v.get("Last-Modified"), now) for key, v in validators.items()],
+        )
+
+    def load_validators(self) -> Dict[str, Dict[str, str]]:
+        out: Dict[str, Dict[str, str]] = {}
+        for key, etag, last_modified in self.conn.execute("SELECT key, etag, last_modified FROM validators"):
+            entry = {}
+            if etag:
+                entry["ETag"] = etag
+            if last_modified:
+                entry["Last-Modified"] = last_modified
+            out[key] = entry
+        return out
+
+    # Snapshots
+
+    def put_snapshot(self, name: str, data: Dict) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?)",
+            (name, utcnow().isoformat(), dumps_str(data)),
+        )
+
+    def load_snapshot(self, name: str) -> Optional[Dict]:
+        row = self.conn.execute("SELECT data FROM snapshots WHERE name = ?", (name,)).fetchone()
+        return loads(row[0]) if row else None
+
+    # JSON export views
+
+    def export_json(self, feed_path: str, history_path: str, headers_path: str, history_since: Optional[datetime] = None) -> None:
+        feed = self.load_snapshot("feed")
+        if feed is not None:
+            save_json(feed_path, feed)
+        save_json(history_path, self.load_history(since=history_since))
+        save_json(headers_path, self.load_validators())
+
+    def import_json(self, history: Optional[List[Dict]], validators: Optional[Dict[str, Dict[str, str]]]) -> None:
+        """Seed an empty store from the existing JSON files"""
+        with self.transaction():
+            if history:
+                self.put_history(history)
+            if validators:
+                self.put_validators(validators)
+
+
+def open_store(path: Optional[str] = None) -> Optional[Store]:
+    path = path or STORE_PATH
+    return Store(path) if path else None
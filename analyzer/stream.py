@@ -0,0 +1,243 @@
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timezone
+import asyncio
+import os
+import random
+import time
+
+try:
+    import websockets
+except ImportError:  # optional: only the stream mode needs it
+    websockets = None
+
+from .aggregate import decayed_summary, scored_items
+from .registry import SOURCES
+from .sources import FUNDING_SYMBOLS, TICKER_SYMBOLS, funding_item, ticker_item
+from .serialize import cache_file, dumps_str, load_cache, loads, save_cache
+from .state import DECAY_STATE_PATH, DecayedState, live_key, state_lock
+from .utils import load_json, save_json, utcnow
+
+SPOT_STREAM_URL = "wss://stream.binance.com:9443/stream?streams="
+FUTURES_STREAM_URL = "wss://fstream.binance.com/stream?streams="
+
+# An update per key is published at most this often, and only if it moved enough
+DEBOUNCE_SECONDS = float(os.getenv("FEED_STREAM_DEBOUNCE", "30"))
+TICKER_MIN_DELTA = 0.25  # 24h change, percentage points
+FUNDING_MIN_DELTA = 0.0005  # funding rate, percentage points
+FLUSH_SECONDS = 2.0
+RECONNECT_MAX_SECONDS = 60.0
+
+
+def _category(parser: str) -> str:
+    # Live updates carry the category the registry gives the polled source
+    return next((spec.category for spec in SOURCES if spec.parser == parser), "crypto")
+
+
+def default_stream_urls() -> List[str]:
+    return [
+        SPOT_STREAM_URL + "/".join(f"{s.lower()}@ticker" for s in TICKER_SYMBOLS),
+        FUTURES_STREAM_URL + "/".join(f"{s.lower()}@markPrice" for s in FUNDING_SYMBOLS),
+    ]
+
+
+def parse_message(raw) -> Optional[Tuple[str, float, Dict, float]]:
+    """(key, value, item, min_delta) for a ticker or mark-price event, else None"""
+    try:
+        msg = loads(raw)
+        data = msg.get("data", msg)
+        sym = data["s"]
+        published = datetime.fromtimestamp(int(data["E"]) / 1000.0, tz=timezone.utc)
+        if data.get("e") == "24hrTicker":
+            pct = float(data["P"])
+            item = ticker_item(sym, pct, published, _category("binance_tickers"))
+            return live_key(item), pct, item, TICKER_MIN_DELTA
+        if data.get("e") == "markPriceUpdate":
+            rate = float(data["r"]) * 100.0
+            item = funding_item(sym, rate, published, _category("binance_funding"))
+            return live_key(item), rate, item, FUNDING_MIN_DELTA
+    except (ValueError, KeyError, TypeError, AttributeError):
+        pass
+    return None
+
+
+class Debouncer:
+    """Trailing-edge debounce per key: keeps the latest update and lets it out
+    once `interval` has passed since the key's last emission, if it moved by
+    at least its min_delta."""
+
+    def __init__(self, interval: float = DEBOUNCE_SECONDS):
+        self.interval = interval
+        self.pending: Dict[str, Tuple[float, Dict, float]] = {}
+        self.emitted: Dict[str, Tuple[float, float]] = {}
+
+    def offer(self, key: str, value: float, item: Dict, min_delta: float) -> None:
+        self.pending[key] = (value, item, min_delta)
+
+    def drain(self, now: float) -> List[Tuple[str, Dict]]:
+        out = []
+        for key, (value, item, min_delta) in list(self.pending.items()):
+            last = self.emitted.get(key)
+            if last is not None and now - last[0] < self.interval:
+                continue
+            del self.pending[key]
+            if last is not None and abs(value - last[1]) < min_delta:
+                continue
+            self.emitted[key] = (now, value)
+            out.append((key, item))
+        return out
+
+
+class StreamIngestor:
+    """Folds debounced stream items into the persisted decayed state.
+
+    Each key holds one live contribution (DecayedState.set_live), so a ticker
+    updating every few seconds weighs like a single fresh item rather than
+    piling up. Publishing patches the feed's `decayed` block in place.
+    """
+
+    def __init__(self, state_path: str = DECAY_STATE_PATH, feed_path: str = "feed.json", debounce: float = DEBOUNCE_SECONDS):
+        self.state_path = state_path
+        self.feed_path = feed_path
+        self.debouncer = Debouncer(debounce)
+        self.state: Optional[DecayedState] = None
+        self.state_mtime: Optional[int] = None
+        # Debounced items waiting for the state lock, latest per key
+        self.backlog: Dict[str, Dict] = {}
+        self.published = 0
+
+    def offer(self, raw) -> None:
+        parsed = parse_message(raw)
+        if parsed is not None:
+            self.debouncer.offer(*parsed)
+
+    def _mtime(self) -> Optional[int]:
+        try:
+            return os.stat(cache_file(self.state_path)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load_state(self) -> None:
+        # A batch run may have rewritten the state since our last flush
+        mtime = self._mtime()
+        if self.state is not None and mtime == self.state_mtime:
+            return
+        data = load_cache(self.state_path)
+        try:
+            self.state = DecayedState.from_dict(data) if data else DecayedState()
+        except (KeyError, TypeError, ValueError):
+            self.state = DecayedState()
+        self.state_mtime = mtime
+
+    def flush(self) -> Optional[Dict]:
+        """Apply due updates; returns the published decayed summary, if any"""
+        for key, item in self.debouncer.drain(time.monotonic()):
+            self.backlog[key] = item
+        if not self.backlog:
+            return None
+        with state_lock(self.state_path, blocking=False) as locked:
+            if not locked:
+                return None
+            self._load_state()
+            now = utcnow()
+            self.state.advance(now)
+            keys = {id(item): key for key, item in self.backlog.items()}
+            scored = {id(it): (cat, s, w, it) for _, cat, s, w, it in scored_items(list(self.backlog.values()), now)}
+            for item_id, key in keys.items():
+                if item_id in scored:
+                    cat, s, w, it = scored[item_id]
+                    self.state.set_live(key, cat, it.get("source"), s, w)
+                else:
+                    # Back to neutral: withdraw the previous contribution
+                    self.state.drop_live(key)
+            save_cache(self.state_path, self.state.to_dict())
+            self.state_mtime = self._mtime()
+            self.backlog.clear()
+            summary = decayed_summary(self.state)
+            # Still under the lock: a batch run rewrites feed.json while holding it
+            self._publish(summary)
+        return summary
+
+    def _publish(self, summary: Dict) -> None:
+        feed = load_json(self.feed_path)
+        if not isinstance(feed, dict):
+            return
+        feed["decayed"] = summary
+        save_json(self.feed_path, feed)
+        self.published += 1
+
+
+async def _consume(url: str, ingestor: StreamIngestor) -> None:
+    delay = 1.0
+    while True:
+        try:
+            async with websockets.connect(url, ping_interval=20) as ws:
+                delay = 1.0
+                async for raw in ws:
+                    ingestor.offer(raw)
+        except (OSError, websockets.WebSocketException):
+            pass
+        await asyncio.sleep(delay * (0.5 + random.random()))
+        delay = min(RECONNECT_MAX_SECONDS, delay * 2)
+
+
+async def _flush_loop(ingestor: StreamIngestor) -> None:
+    while True:
+        await asyncio.sleep(FLUSH_SECONDS)
+        ingestor.flush()
+
+
+async def serve_standin(host: str = "127.0.0.1", port: int = 0, interval: float = 0.2, seed: Optional[int] = None):
+    """Local stand-in for the Binance combined streams.
+
+    Every connection gets random-walk 24hrTicker and markPriceUpdate events for
+    the default symbols, whatever streams it asks for.
+    """
+    async def handler(ws, path=None):
+        rng = random.Random(seed)
+        pct = {sym: rng.uniform(-3.0, 3.0) for sym in TICKER_SYMBOLS}
+        rate = {sym: rng.uniform(-0.0002, 0.0004) for sym in FUNDING_SYMBOLS}
+        try:
+            while True:
+                ms = int(time.time() * 1000)
+                for sym in TICKER_SYMBOLS:
+                    pct[sym] += rng.gauss(0.0, 0.3)
+                    data = {"e": "24hrTicker", "E": ms, "s": sym, "P": f"{pct[sym]:.3f}"}
+                    await ws.send(dumps_str({"stream": f"{sym.lower()}@ticker", "data": data}))
+                for sym in FUNDING_SYMBOLS:
+                    rate[sym] += rng.gauss(0.0, 0.00002)
+                    data = {"e": "markPriceUpdate", "E": ms, "s": sym, "r": f"{rate[sym]:.8f}"}
+                    await ws.send(dumps_str({"stream": f"{sym.lower()}@markPrice", "data": data}))
+                await asyncio.sleep(interval)
+        except websockets.ConnectionClosed:
+            pass
+
+    return await websockets.serve(handler, host, port)
+
+
+async def _run(urls: Optional[List[str]], duration: Optional[float], standin: bool, ingestor: StreamIngestor) -> None:
+    server = None
+    if standin:
+        server = await serve_standin()
+        port = list(server.sockets)[0].getsockname()[1]
+        urls = [f"ws://127.0.0.1:{port}/stream"]
+    tasks = [asyncio.ensure_future(_consume(url, ingestor)) for url in urls or default_stream_urls()]
+    tasks.append(asyncio.ensure_future(_flush_loop(ingestor)))
+    try:
+        await asyncio.wait(tasks, timeout=duration)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+        ingestor.flush()
+
+
+def run_stream(urls: Optional[List[str]] = None, duration: Optional[float] = None, standin: bool = False, **kwargs) -> StreamIngestor:
+    """Ingest ticker/funding streams until `duration` seconds pass (or forever)"""
+    if websockets is None:
+        raise RuntimeError("Streaming mode needs the 'websockets' package (pip install websockets)")
+    ingestor = StreamIngestor(**kwargs)
+    asyncio.run(_run(urls, duration, standin, ingestor))
+    return ingestor
@@ -0,0 +1,130 @@
+from typing import Any, Generic, List, Optional, Tuple, TypeVar
+import heapq
+import math
+
+T = TypeVar("T")
+
+TDIGEST_COMPRESSION = 100.0
+
+
+class TopK(Generic[T]):
+    """Bounded min-heap keeping the values with the k largest keys.
+
+    Keys must be comparable and should be unique (add an index to break ties);
+    two TopK built over disjoint inputs merge into the TopK of the union.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self.heap: List[Tuple[Any, T]] = []
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def push(self, key: Any, value: T) -> None:
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, (key, value))
+        elif key > self.heap[0][0]:
+            heapq.heapreplace(self.heap, (key, value))
+
+    def merge(self, other: "TopK[T]") -> "TopK[T]":
+        for key, value in other.heap:
+            self.push(key, value)
+        return self
+
+    def items(self) -> List[T]:
+        """Values, largest key first"""
+        return [value for _, value in sorted(self.heap, key=lambda e: e[0], reverse=True)]
+
+
+def _k_scale(q: float, compression: float) -> float:
+    return compression / (2.0 * math.pi) * math.asin(2.0 * q - 1.0)
+
+
+def _k_inverse(k: float, compression: float) -> float:
+    return (math.sin(min(math.pi / 2.0, k * 2.0 * math.pi / compression)) + 1.0) / 2.0
+
+
+class TDigest:
+    """Merging t-digest (Dunning) for weighted quantiles.
+
+    Centroids are kept small near the tails (k1 scale function), so p10/p90
+    stay accurate with about `compression` centroids whatever the input size.
+    Digests merge exactly like a combined stream would, in any order.
+    """
+
+    def __init__(self, compression: float = TDIGEST_COMPRESSION):
+        self.compression = compression
+        self.centroids: List[Tuple[float, float]] = []
+        self.buffer: List[Tuple[float, float]] = []
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __len__(self) -> int:
+        return len(self.centroids) + len(self.buffer)
+
+    def add(self, x: float, w: float = 1.0) -> None:
+        if w <= 0:
+            return
+        self.buffer.append((x, w))
+        self.total += w
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+        if len(self.buffer) >= 5 * self.compression:
+            self._compress()
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        self.buffer.extend(other.centroids)
+        self.buffer.extend(other.buffer)
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def copy(self) -> "TDigest":
+        out = TDigest(self.compression)
+        return out.merge(self)
+
+    def _compress(self) -> None:
+        if not self.buffer:
+            return
+        points = sorted(self.centroids + self.buffer)
+        self.buffer = []
+        total = self.total
+        merged: List[Tuple[float, float]] = []
+        mean, weight = points[0]
+        done = 0.0
+        q_limit = _k_inverse(_k_scale(0.0, self.compression) + 1.0, self.compression)
+        for x, w in points[1:]:
+            if (done + weight + w) / total <= q_limit:
+                weight += w
+                mean += (x - mean) * w / weight
+            else:
+                merged.append((mean, weight))
+                done += weight
+                q_limit = _k_inverse(_k_scale(done / total, self.compression) + 1.0, self.compression)
+                mean, weight = x, w
+        merged.append((mean, weight))
+        self.centroids = merged
+
+    def quantile(self, q: float) -> Optional[float]:
+        self._compress()
+        if not self.centroids:
+            return None
+        if len(self.centroids) == 1:
+            return self.centroids[0][0]
+        target = q * self.total
+        # Interpolate between centroid midpoints, pinned to the exact min/max
+        prev_pos, prev_x = 0.0, self.min
+        cum = 0.0
+        for mean, w in self.centroids:
+            pos = cum + w / 2.0
+            if target < pos:
+                span = pos - prev_pos
+                return prev_x + (mean - prev_x) * ((target - prev_pos) / span if span > 0 else 0.0)
+            prev_pos, prev_x = pos, mean
+            cum += w
+        span = self.total - prev_pos
+        return prev_x + (self.max - prev_x) * ((target - prev_pos) / span if span > 0 else 1.0)
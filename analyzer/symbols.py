@@ -0,0 +1,181 @@
+from typing import Dict, Iterable, List, Optional
+import os
+import re
+
+from .serialize import load_cache, save_cache
+from .utils import CACHE_DIR, utcnow
+
+SYMBOLS_CACHE_PATH = os.path.join(CACHE_DIR, "symbols.json")
+
+# Fallback universe until the CoinGecko coin list has been cached once
+DEFAULT_COINS = [
+    {"symbol": "btc", "name": "Bitcoin"},
+    {"symbol": "eth", "name": "Ethereum"},
+    {"symbol": "sol", "name": "Solana"},
+    {"symbol": "bnb", "name": "BNB"},
+    {"symbol": "xrp", "name": "XRP"},
+    {"symbol": "ada", "name": "Cardano"},
+    {"symbol": "doge", "name": "Dogecoin"},
+    {"symbol": "ton", "name": "Toncoin"},
+    {"symbol": "dot", "name": "Polkadot"},
+    {"symbol": "avax", "name": "Avalanche"},
+    {"symbol": "link", "name": "Chainlink"},
+]
+
+# Tickers and coin names that are also everyday English or finance words.
+# They only count when written as a cashtag ($NEAR), never as a bare word.
+AMBIGUOUS_WORDS = {
+    "ace", "ai", "all", "ant", "ape", "ark", "at", "be", "beam", "blur", "bond", "cake",
+    "ceo", "comp", "core", "cpi", "dash", "down", "eu", "etf", "fed", "flow", "fun",
+    "gal", "gas", "gdp", "go", "gt", "high", "hot", "id", "ipo", "it", "joy", "leo",
+    "looks", "low", "magic", "maker", "mask", "me", "meme", "move", "near", "not", "ok",
+    "om", "on", "one", "optimism", "people", "polygon", "ray", "render", "rose", "safe",
+    "sand", "sec", "so", "stacks", "stellar", "sun", "time", "uk", "up", "us", "usa", "woo",
+}
+
+CASHTAG_RE = re.compile(r"\$([A-Z]{2,6})\b")
+CONTRACT_RE = re.compile(r"\b0x[a-fA-F0-9]{6,}\b")
+UPPER_TOKEN_RE = re.compile(r"\b[A-Z][A-Z0-9]{1,9}\b")
+NAME_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+_NAME_END = ""
+
+
+def _trie_pattern(node: Dict) -> str:
+    # Prefix-factored alternation: the regex engine walks the trie one
+    # character at a time instead of retrying every name at every offset
+    alts = []
+    for ch, child in sorted(node.items()):
+        if ch == _NAME_END:
+            continue
+        alts.append((r"\s+" if ch == " " else re.escape(ch)) + _trie_pattern(child))
+    if not alts:
+        return ""
+    body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+    return "(?:" + body + ")?" if _NAME_END in node else body
+
+
+class SymbolExtractor:
+    """Ticker/name matcher built once from a coin universe.
+
+    Bare tickers are a set lookup per upper-case token; coin names are folded
+    into a character trie and compiled to a single regex, so "Bitcoin Cash"
+    wins over "Bitcoin" by longest match.
+    """
+
+    def __init__(self, tickers: Dict[str, str], names: Dict[str, str]):
+        self.tickers = tickers
+        self.names = names
+        trie: Dict = {}
+        for name in names:
+            node = trie
+            for ch in name:
+                node = node.setdefault(ch, {})
+            node[_NAME_END] = True
+        pattern = _trie_pattern(trie)
+        self.names_re = re.compile(r"(?<![a-z0-9])" + pattern + r"(?![a-z0-9])") if pattern else None
+
+    @classmethod
+    def from_coins(cls, coins: Iterable[Dict]) -> "SymbolExtractor":
+        tickers: Dict[str, str] = {}
+        names: Dict[str, str] = {}
+        # Coins arrive by market cap, so the largest coin wins a shared ticker or name
+        for coin in coins:
+            symbol = (coin.get("symbol") or "").upper()
+            if not (2 <= len(symbol) <= 10) or not symbol.isalnum():
+                continue
+            if symbol.lower() not in AMBIGUOUS_WORDS:
+                tickers.setdefault(symbol, symbol)
+            name = " ".join(NAME_TOKEN_RE.findall((coin.get("name") or "").lower()))
+            if name and name not in AMBIGUOUS_WORDS:
+                names.setdefault(name, symbol)
+        return cls(tickers, names)
+
+    def to_dict(self) -> Dict:
+        return {"tickers": self.tickers, "names": self.names}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SymbolExtractor":
+        return cls(data.get("tickers") or {}, data.get("names") or {})
+
+    def extract(self, text: str, names: bool = True) -> List[str]:
+        # Cashtags count even for symbols outside the universe
+        found = set(CASHTAG_RE.findall(text)) if "$" in text else set()
+        tickers = self.tickers
+        found.update(tickers[tok] for tok in UPPER_TOKEN_RE.findall(text) if tok in tickers)
+        if names and self.names_re is not None:
+            for m in self.names_re.findall(text.lower()):
+                found.add(self.names[" ".join(m.split())])
+        return sorted(found)
+
+    def has_symbols(self, text: str) -> bool:
+        if "$" in text and CASHTAG_RE.search(text):
+            return True
+        if "0x" in text and CONTRACT_RE.search(text):
+            return True
+        tickers = self.tickers
+        return any(tok in tickers for tok in UPPER_TOKEN_RE.findall(text))
+
+
+_extractor: Optional[SymbolExtractor] = None
+# built_at of the cached universe the extractor was loaded from (None for the defaults)
+_extractor_stamp: Optional[str] = None
+
+
+def get_extractor() -> SymbolExtractor:
+    """Process-wide extractor, loaded from the on-disk cache when present"""
+    global _extractor, _extractor_stamp
+    if _extractor is None:
+        cached = load_cache(SYMBOLS_CACHE_PATH)
+        _extractor = SymbolExtractor.from_dict(cached) if cached else SymbolExtractor.from_coins(DEFAULT_COINS)
+        _extractor_stamp = cached.get("built_at") if cached else None
+    return _extractor
+
+
+def universe_stamp() -> Optional[str]:
+    get_extractor()
+    return _extractor_stamp
+
+
+def sync_universe(stamp: Optional[str]) -> None:
+    # Long-lived worker processes reload the cache once the parent has refreshed it
+    global _extractor
+    if universe_stamp() != stamp:
+        _extractor = None
+        get_extractor()
+
+
+def build_symbol_universe(coins: List[Dict]) -> Optional[SymbolExtractor]:
+    """Extractor for a CoinGecko /coins/markets list, or None if it would not
+    change the current one. Touches no global state, so any thread may call it."""
+    if not coins:
+        return None
+    extractor = SymbolExtractor.from_coins(list(coins) + DEFAULT_COINS)
+    if extractor.to_dict() == get_extractor().to_dict():
+        return None
+    return extractor
+
+
+def install_symbol_universe(extractor: SymbolExtractor) -> None:
+    """Make extractor the process-wide one and cache it for workers and later runs"""
+    global _extractor, _extractor_stamp
+    _extractor = extractor
+    _extractor_stamp = utcnow().isoformat()
+    save_cache(SYMBOLS_CACHE_PATH, {**extractor.to_dict(), "built_at": _extractor_stamp})
+
+
+def refresh_symbol_universe(coins: List[Dict]) -> None:
+    """Rebuild and cache the extractor from a CoinGecko /coins/markets list"""
+    extractor = build_symbol_universe(coins)
+    if extractor is not None:
+        install_symbol_universe(extractor)
+
+
+def extract_crypto_symbols(text: str) -> List[str]:
+    # Cashtags, bare tickers and coin names from the cached universe
+    return get_extractor().extract(text)
+
+
+def detect_crypto_symbols(text: str) -> bool:
+    # Cashtags like $BTC, known tickers, or contract addresses 0x...
+    return get_extractor().has_symbols(text)
@@ -1,13 +1,18 @@
-import json
 import os
 import re
+import threading
 import time
 from datetime import datetime, timezone, timedelta
 from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
 
 import requests
 from dateutil import parser as dateparser
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from tenacity import retry, stop_after_attempt, stop_any, wait_exponential, retry_if_exception_type
+
+from .hedge import Cancelled, hedged_call, latency
+from .httpcache import HttpCache
+from .serialize import dumps, loads, write_atomic
 
 # Project constants (replace placeholders)
 GITHUB_USERNAME = os.getenv("GITHUB_USERNAME", "<YOUR_GITHUB_USERNAME>")
@@ -25,11 +30,37 @@ USER_AGENT = (
 
 CACHE_DIR = os.path.join("analyzer", ".cache")
 HEADERS_CACHE_PATH = os.path.join(CACHE_DIR, "headers.json")
+HTTP_CACHE_DIR = os.path.join(CACHE_DIR, "http")
+HTTP_CACHE_ENABLED = os.getenv("FEED_HTTP_CACHE", "1") != "0"
+# Per-host latency samples behind the hedging threshold, kept between runs
+LATENCY_PATH = os.path.join(CACHE_DIR, "latency.json")
 
 class FetchError(Exception):
     pass
 
 
+class DeadlineExceeded(FetchError):
+    pass
+
+
+# Run-wide deadline on the time.monotonic() clock; no request outlives it
+_deadline: Optional[float] = None
+
+
+def set_deadline(deadline: Optional[float]) -> None:
+    global _deadline
+    _deadline = deadline
+
+
+def _deadline_passed() -> bool:
+    left = time_left()
+    return left is not None and left <= 0
+
+
+def time_left() -> Optional[float]:
+    return None if _deadline is None else _deadline - time.monotonic()
+
+
 def utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
@@ -42,6 +73,15 @@ def parse_ts(value: str) -> datetime:
     return dateparser.parse(value).astimezone(timezone.utc)
 
 
+def parse_duration(value: str) -> timedelta:
+    # "90s", "30m", "4h", "7d"
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhd])\s*", value or "")
+    if not m:
+        raise ValueError(f"Invalid duration: {value!r} (expected a number with s, m, h or d)")
+    unit = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}[m.group(2)]
+    return timedelta(**{unit: float(m.group(1))})
+
+
 def normalize_url(url: str) -> str:
     url = url.strip()
     url = re.sub(r"#.*$", "", url)
@@ -50,34 +90,94 @@ def normalize_url(url: str) -> str:
 
 def load_headers_cache() -> Dict[str, Dict[str, str]]:
     try:
-        with open(HEADERS_CACHE_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(HEADERS_CACHE_PATH, "rb") as f:
+            return loads(f.read())
     except FileNotFoundError:
         return {}
-    except json.JSONDecodeError:
+    except ValueError:
         return {}
 
 
 def save_headers_cache(data: Dict[str, Dict[str, str]]) -> None:
-    os.makedirs(CACHE_DIR, exist_ok=True)
-    with open(HEADERS_CACHE_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    save_json(HEADERS_CACHE_PATH, data)
 
 
 @retry(
     reraise=True,
     wait=wait_exponential(multiplier=0.5, min=1, max=10),
-    stop=stop_after_attempt(3),
+    stop=stop_any(stop_after_attempt(3), lambda retry_state: _deadline_passed()),
     retry=retry_if_exception_type(FetchError),
 )
-def http_get(url: str, headers: Optional[Dict[str, str]] = None, timeout: int = 15) -> Tuple[int, Dict[str, str], bytes]:
+def _fetch(url: str, headers: Dict[str, str], timeout: int) -> Tuple[int, Dict[str, str], bytes]:
+    # Opt-in hedging (FEED_HTTP_HEDGE=1) races a duplicate past the host's p95
+    host = urlsplit(url).netloc
+    return hedged_call(host, lambda cancel: _request_once(url, headers, timeout, cancel))
+
+
+def _request_once(url: str, headers: Dict[str, str], timeout: int, cancel: threading.Event) -> Tuple[int, Dict[str, str], bytes]:
+    left = time_left()
+    if left is not None:
+        if left <= 0:
+            raise DeadlineExceeded(url)
+        timeout = min(timeout, left)
     try:
-        resp = requests.get(url, headers={"User-Agent": USER_AGENT, **(headers or {})}, timeout=timeout)
+        resp = requests.get(url, headers={"User-Agent": USER_AGENT, **headers}, timeout=timeout, stream=True)
     except requests.RequestException as e:
         raise FetchError(str(e))
-    if resp.status_code >= 500:
-        raise FetchError(f"Server error {resp.status_code}")
-    return resp.status_code, dict(resp.headers), resp.content
+    # Streaming lets a hedged loser drop its connection instead of reading the body
+    with resp:
+        if resp.status_code >= 500:
+            raise FetchError(f"Server error {resp.status_code}")
+        chunks = []
+        try:
+            for chunk in resp.iter_content(chunk_size=65536):
+                if cancel.is_set():
+                    raise Cancelled()
+                if _deadline is not None and time.monotonic() > _deadline:
+                    raise DeadlineExceeded(url)
+                chunks.append(chunk)
+        except requests.RequestException as e:
+            raise FetchError(str(e))
+    return resp.status_code, dict(resp.headers), b"".join(chunks)
+
+
+http_cache = HttpCache(HTTP_CACHE_DIR)
+latency.load(LATENCY_PATH)
+
+
+def save_latency() -> None:
+    latency.save(LATENCY_PATH)
+
+
+def http_get(url: str, headers: Optional[Dict[str, str]] = None, timeout: int = 15, cache: bool = HTTP_CACHE_ENABLED) -> Tuple[int, Dict[str, str], bytes]:
+    headers = dict(headers or {})
+    entry = http_cache.lookup(url) if cache else None
+    # Callers doing their own revalidation (fetch_rss) still get their 304s
+    caller_validates = "If-None-Match" in headers or "If-Modified-Since" in headers
+
+    if entry is not None and entry.is_fresh(time.time()):
+        http_cache.touch(entry, url)
+        return entry.status, entry.headers, entry.body
+    if entry is not None and not caller_validates:
+        headers.update(entry.validators())
+
+    request_time = time.time()
+    try:
+        status, resp_headers, content = _fetch(url, headers, timeout)
+    except FetchError:
+        # stale-if-error: a stale body beats no body when the upstream is down
+        if entry is not None and entry.usable_on_error(time.time()):
+            return entry.status, entry.headers, entry.body
+        raise
+    if not cache:
+        return status, resp_headers, content
+    if status == 304 and entry is not None:
+        http_cache.refresh(entry, resp_headers, url, request_time)
+        if not caller_validates:
+            return entry.status, entry.headers, entry.body
+    elif status in (200, 203):
+        http_cache.store(status, resp_headers, content, url, request_time)
+    return status, resp_headers, content
 
 
 def exponential_decay_weight(age_hours: float, half_life_hours: float = DEFAULT_HALF_LIFE_HOURS) -> float:
@@ -87,26 +187,19 @@ def exponential_decay_weight(age_hours: float, half_life_hours: float = DEFAULT_
 
 
 def save_json(path: str, data: Any) -> None:
-    dirname = os.path.dirname(path)
-    if dirname:  # Only create directory if path has a directory component
-        os.makedirs(dirname, exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    # Written to a temp file and renamed, so readers never see a partial file
+    write_atomic(path, dumps(data, pretty=True))
 
 
 def load_json(path: str) -> Optional[Any]:
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(path, "rb") as f:
+            return loads(f.read())
     except FileNotFoundError:
         return None
 
 
 def detect_crypto_symbols(text: str) -> bool:
-    # Detect cashtags like $BTC or common tickers, or contract addresses 0x...
-    if bool(re.search(r"\$[A-Z]{2,6}\b", text)) or bool(re.search(r"\b0x[a-fA-F0-9]{6,}\b", text)):
-        return True
-    # Common top tickers without $ prefix
-    COMMON = {"BTC","ETH","SOL","BNB","XRP","ADA","DOGE","TON","DOT","AVAX","LINK"}
-    tokens = re.findall(r"\b[A-Z]{2,5}\b", text)
-    return any(tok in COMMON for tok in tokens) 
\ No newline at end of file
+    # The matcher lives in analyzer.symbols, which itself imports this module
+    from .symbols import detect_crypto_symbols as detect
+    return detect(text)
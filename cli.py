@@ -1,6 +1,9 @@
 import argparse
 import os
-from typing import List, Dict
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import List, Dict, Optional
 
 # Load .env file if it exists
 try:
@@ -9,45 +12,304 @@ try:
 except ImportError:
     pass
 
-from analyzer.sources import fetch_all_sources
-from analyzer.aggregate import aggregate
-from analyzer.utils import load_json, save_json
+from analyzer import sources
+from analyzer.sources import fetch_sources
+from analyzer.aggregate import aggregate, WINDOWS
+from analyzer.archive import append_items
+from analyzer.indicators import get_market_indicators, refresh_market_indicators
+from analyzer.shard import fetch_sharded, open_queue, work
+from analyzer.seen import item_key
+from analyzer.registry import SOURCES, carried_items, due_sources, load_schedule, mark_fetched, save_schedule
+from analyzer.sentiment import DEFAULT_BITS, SCORER_MODEL_PATH, get_scorer
+from analyzer.serialize import dumps_str
+from analyzer.series import HISTORY_RETENTION, retain_history
+from analyzer.state import load_decayed_state, save_decayed_state, state_lock
+from analyzer.store import open_store
+from analyzer.symbols import SymbolExtractor, install_symbol_universe
+from analyzer.utils import load_json, save_json, parse_ts, parse_duration, save_latency, utcnow, load_headers_cache, HEADERS_CACHE_PATH
 
 PUBLIC_FEED = "feed.json"
 PUBLIC_HISTORY = "history.json"
+BACKFILL_HISTORY = "history.backfill.json"
+# history.json keeps HISTORY_RETENTION of points; the feed embeds the latest
+# ~4 days raw plus downsampled series over the whole span
+HISTORY_LIMIT = 96
 
 SAMPLES_PATH = os.path.join("analyzer", "samples", "sample_items.json")
 
+# Overall run budget (e.g. "10m"); fetching stops early enough to publish in time
+RUN_DEADLINE = os.getenv("FEED_RUN_DEADLINE")
+# Share of the budget kept for aggregation and publishing
+PUBLISH_RESERVE = 0.2
+# Fetch shards handed to worker processes via the work queue (1 = fetch in-process)
+FETCH_SHARDS = int(os.getenv("FEED_SHARDS", "1"))
 
-def run(window: str, offline: bool = False) -> int:
-    history = load_json(PUBLIC_HISTORY) or []
 
+def run(
+    windows: Optional[List[str]] = None,
+    offline: bool = False,
+    db: Optional[str] = None,
+    deadline: Optional[timedelta] = None,
+    shards: int = FETCH_SHARDS,
+    workers: Optional[int] = None,
+) -> int:
+    # A concurrent `cli.py stream` holds off while the batch run owns the decayed state
+    with state_lock():
+        return _run(windows, offline, db, deadline, shards, workers)
+
+
+def _run(
+    windows: Optional[List[str]],
+    offline: bool,
+    db: Optional[str],
+    deadline: Optional[timedelta],
+    shards: int = 1,
+    workers: Optional[int] = None,
+) -> int:
+    fetch_deadline = None
+    if deadline is not None:
+        fetch_deadline = time.monotonic() + deadline.total_seconds() * (1.0 - PUBLISH_RESERVE)
+
+    store = open_store(db)
+    if store is not None:
+        if store.is_empty():
+            store.import_json(load_json(PUBLIC_HISTORY), load_headers_cache())
+        history = store.load_history(since=utcnow() - HISTORY_RETENTION)
+        sources.use_headers_cache(store.load_validators())
+    else:
+        history = load_json(PUBLIC_HISTORY) or []
+
+    # Offline/sample runs must not fold sample items into the persisted state
+    state = None if offline else load_decayed_state()
+
+    fetched = False
+    missing: List[str] = []
+    expected: List[str] = []
+    failed: Dict[str, str] = {}
     if offline:
         items = load_json(SAMPLES_PATH) or []
+        market_indicators = get_market_indicators(offline=True)
     else:
+        # Indicators have their own cached snapshot; refresh it alongside the fetch
+        pool = ThreadPoolExecutor(max_workers=1)
+        # A rebuilt symbol universe is handed back rather than installed by the
+        # worker thread, so it cannot swap the extractor under aggregate()
+        universe: List[SymbolExtractor] = []
+        indicators_future = pool.submit(get_market_indicators, universe=universe)
+        # Only sources whose refresh interval has elapsed are fetched
+        now = utcnow()
+        schedule = load_schedule()
+        due = due_sources(SOURCES, schedule, now)
         try:
-            items = fetch_all_sources()
+            # With a store, validators are written in the run transaction below
+            if shards > 1:
+                fetch = fetch_sharded(due, shards, fetch_deadline, workers, persist_headers=store is None)
+            else:
+                fetch = fetch_sources(fetch_deadline, persist_headers=store is None, specs=due)
+            items, missing, failed = fetch.items, fetch.missing, fetch.errors
+            expected = [spec.name for spec in due]
+            mark_fetched(schedule, [n for n in expected if n not in missing and n not in fetch.failed], now)
+            fetched = True
         except Exception as e:
             # Resilience: on failure, keep last snapshot
             items = []
+        try:
+            timeout = None if fetch_deadline is None else max(0.0, fetch_deadline - time.monotonic())
+            market_indicators = indicators_future.result(timeout=timeout)
+            for extractor in universe:
+                install_symbol_universe(extractor)
+        except Exception:
+            # Past the deadline the abandoned refresh may still finish, but
+            # its universe is dropped; the next run rebuilds it
+            market_indicators = get_market_indicators(offline=True)
+        pool.shutdown(wait=False)
+        save_latency()
+        # Raw items are kept so later weighting changes can be replayed;
+        # the seen filter skips those ingested by earlier runs
+        fresh = [it for it in items if state.is_new(item_key(it))]
+        # Sources not fetched this run (not due, unchanged or failing) keep
+        # contributing their latest archived items
+        answered = {it.get("source") for it in items}
+        idle = [spec for spec in SOURCES if spec.name not in missing and (spec not in due or spec.name not in answered)]
+        items = items + carried_items(idle, now, store, timedelta(hours=max(WINDOWS.values())))
+        if fresh and store is None:
+            append_items(fresh)
 
     # If we failed to fetch and have no previous feed, fallback to samples
     if not items and not os.path.exists(PUBLIC_FEED):
         offline = True
         items = load_json(SAMPLES_PATH) or []
 
-    result = aggregate(items, history)
+    if offline:
+        # The sample fallback must not touch the persisted state either
+        state = None
+    result = aggregate(
+        items, history, windows, state, market_indicators=market_indicators,
+        missing_sources=missing, expected_sources=expected, failed_sources=failed,
+    )
 
     # Persist
-    save_json(PUBLIC_FEED, result)
-    save_json(PUBLIC_HISTORY, result.get("history", []))
+    if store is not None:
+        with store.transaction():
+            if not offline:
+                store.put_items(fresh)
+            store.put_history(result["history"][-1:])
+            if fetched:
+                store.put_validators(dict(sources.headers_cache))
+            store.put_snapshot("feed", result)
+        history_since = parse_ts(result["updated_at"]) - HISTORY_RETENTION
+        store.export_json(PUBLIC_FEED, PUBLIC_HISTORY, HEADERS_CACHE_PATH, history_since)
+        store.close()
+    else:
+        save_json(PUBLIC_FEED, result)
+        save_json(PUBLIC_HISTORY, retain_history(history + result["history"][-1:], parse_ts(result["updated_at"])))
+    if state is not None:
+        save_decayed_state(state)
+    if fetched:
+        save_schedule(schedule)
+
+    return 0
+
+
+def run_worker(queue: Optional[str], idle_exit: Optional[str]) -> int:
+    q = open_queue(queue)
+    try:
+        done = work(q, idle_exit=parse_duration(idle_exit).total_seconds() if idle_exit else None)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        q.close()
+    print(f"Processed {done} shards")
+    return 0
+
+
+def run_indicators() -> int:
+    indicators = refresh_market_indicators()
+    print(f"Indicators snapshot as of {indicators.get('timestamp')} ({indicators.get('data_sources', 0)} sources)")
+    return 0
+
 
+def run_stream(urls: Optional[List[str]], duration: Optional[str], standin: bool) -> int:
+    # Imported lazily: websockets is an optional dependency
+    from analyzer.stream import run_stream as stream
+
+    ingestor = stream(urls, parse_duration(duration).total_seconds() if duration else None, standin)
+    print(f"Published {ingestor.published} decayed updates to {PUBLIC_FEED}")
+    return 0
+
+
+def run_serve(host: str, port: int) -> int:
+    from analyzer.serve import serve
+
+    serve(host, port, PUBLIC_FEED, PUBLIC_HISTORY)
+    return 0
+
+
+def run_backfill(start: str, end: Optional[str], step: str, out: str, db: Optional[str] = None, check: bool = False) -> int:
+    # Imported lazily: replay pulls in the process pool machinery
+    from analyzer.backfill import backfill, check_slice, load_items
+
+    store = open_store(db)
+    start_dt, end_dt = parse_ts(start), parse_ts(end) if end else utcnow()
+    points = backfill(start_dt, end_dt, parse_duration(step), store=store)
+    save_json(out, points)
+    print(f"Wrote {len(points)} history points to {out}")
+    status = 0
+    if check and points:
+        # The last slice must match a live aggregate() run at that time
+        last = parse_ts(points[-1]["ts"])
+        match, replayed, live = check_slice(load_items(last, last, store=store), last)
+        print(f"Check at {last.isoformat()}: {'replay matches aggregate' if match else 'MISMATCH'}")
+        if not match:
+            print(f"  replayed:  {dumps_str(replayed)}")
+            print(f"  aggregate: {dumps_str(live)}")
+            status = 1
+    if store is not None:
+        store.close()
+    return status
+
+
+def run_train_scorer(data: str, out: str, bits: int, epochs: int) -> int:
+    from analyzer.sentiment_train import train_model
+
+    report = train_model(data, out, bits, epochs)
+    print(dumps_str(report))
+    return 0
+
+
+def run_bench_scorer(model: str, data: Optional[str], lookback: str) -> int:
+    from analyzer.archive import iter_items
+    from analyzer.sentiment_train import benchmark, load_labelled
+
+    labels = None
+    if data:
+        examples = load_labelled(data)
+        texts = [t for t, _ in examples]
+        labels = [l for _, l in examples]
+    else:
+        now = utcnow()
+        texts = [(it.get("text") or it.get("title") or "") for it in iter_items(now - parse_duration(lookback), now)]
+    if not texts:
+        print("No texts to score")
+        return 1
+    print(dumps_str(benchmark(model, texts, labels)))
     return 0
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Market Sentiment Feed CLI")
-    parser.add_argument("--window", choices=["1h", "4h"], default="1h", help="Analysis window")
+    parser.add_argument("--window", dest="windows", action="append", choices=list(WINDOWS), help="Analysis window to publish (repeatable; default: all)")
     parser.add_argument("--offline", action="store_true", help="Use bundled sample data")
+    parser.add_argument("--db", help="SQLite store path (default: $FEED_DB); JSON files become export views")
+    parser.add_argument("--shards", type=int, default=FETCH_SHARDS, help="Split due sources into this many shards fetched by worker processes (default: $FEED_SHARDS or 1)")
+    parser.add_argument("--workers", type=int, help="Local worker processes for --shards (default: one per shard; 0 relies on `worker` processes elsewhere)")
+    parser.add_argument("--deadline", default=RUN_DEADLINE, help="Run time budget, e.g. 90s or 10m; units s, m, h, d (default: $FEED_RUN_DEADLINE); slow sources are skipped")
+    sub = parser.add_subparsers(dest="command")
+    bf = sub.add_parser("backfill", help="Recompute history from archived raw items")
+    bf.add_argument("--from", dest="start", required=True, help="First slice time (ISO8601)")
+    bf.add_argument("--to", dest="end", help="Last slice time (ISO8601, default: now)")
+    bf.add_argument("--step", default="4h", help="Slice spacing, e.g. 1h, 4h, 1d")
+    bf.add_argument("--out", default=BACKFILL_HISTORY, help="Output history JSON path")
+    bf.add_argument("--check", action="store_true", help="Verify the last slice against aggregate() on the same items")
+    sub.add_parser("indicators", help="Refresh the cached market indicators snapshot")
+    st = sub.add_parser("stream", help="Feed live ticker/funding WebSocket updates into the decayed state")
+    st.add_argument("--url", dest="urls", action="append", help="WebSocket URL (repeatable; default: Binance spot tickers and futures mark prices)")
+    st.add_argument("--duration", help="Stop after this long, e.g. 30m (default: run until interrupted)")
+    st.add_argument("--standin", action="store_true", help="Serve and consume a local stand-in stream instead of Binance")
+    wk = sub.add_parser("worker", help="Fetch source shards from the work queue")
+    wk.add_argument("--queue", help="Work queue (default: $FEED_QUEUE or analyzer/.cache/queue.db)")
+    wk.add_argument("--idle-exit", help="Exit after the queue has been empty this long, e.g. 5m (default: never)")
+    ts = sub.add_parser("train-scorer", help="Train the hashed linear sentiment model from a labelled file")
+    ts.add_argument("--data", required=True, help="JSON / JSON Lines records with text (or title) and label")
+    ts.add_argument("--out", default=SCORER_MODEL_PATH, help="Model file (default: $FEED_SCORER_MODEL)")
+    ts.add_argument("--bits", type=int, default=DEFAULT_BITS, help="Hash space is 2**bits weights")
+    ts.add_argument("--epochs", type=int, default=8)
+    bs = sub.add_parser("bench-scorer", help="Compare the hashed model with the lexicon scorer")
+    bs.add_argument("--model", default=SCORER_MODEL_PATH, help="Model file (default: $FEED_SCORER_MODEL)")
+    bs.add_argument("--data", help="Labelled file to score (default: archived items)")
+    bs.add_argument("--lookback", default="7d", help="Archive span scored without --data")
+    sv = sub.add_parser("serve", help="Serve feed, window and history queries over HTTP from memory")
+    sv.add_argument("--host", default="127.0.0.1")
+    sv.add_argument("--port", type=int, default=8787)
     args = parser.parse_args()
-    raise SystemExit(run(args.window, args.offline)) 
\ No newline at end of file
+    if args.command in (None, "backfill", "stream"):
+        # Fail on a bad FEED_SCORER / FEED_SCORER_MODEL before fetching anything
+        try:
+            get_scorer()
+        except ValueError as e:
+            parser.error(str(e))
+    if args.command == "indicators":
+        raise SystemExit(run_indicators())
+    if args.command == "serve":
+        raise SystemExit(run_serve(args.host, args.port))
+    if args.command == "stream":
+        raise SystemExit(run_stream(args.urls, args.duration, args.standin))
+    if args.command == "train-scorer":
+        raise SystemExit(run_train_scorer(args.data, args.out, args.bits, args.epochs))
+    if args.command == "bench-scorer":
+        raise SystemExit(run_bench_scorer(args.model, args.data, args.lookback))
+    if args.command == "worker":
+        raise SystemExit(run_worker(args.queue, args.idle_exit))
+    if args.command == "backfill":
+        raise SystemExit(run_backfill(args.start, args.end, args.step, args.out, args.db, args.check))
+    raise SystemExit(run(args.windows, args.offline, args.db, parse_duration(args.deadline) if args.deadline else None, args.shards, args.workers)) 
\ No newline at end of file
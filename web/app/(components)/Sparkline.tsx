@@ -1,14 +1,18 @@
-type Props = { values: number[]; color?: string };
+type Props = { values: number[]; times?: number[]; color?: string };
 
-export default function Sparkline({ values, color = "#22c55e" }: Props) {
+export default function Sparkline({ values, times, color = "#22c55e" }: Props) {
 	const data = (values && values.length ? values : Array.from({ length: 24 }, (_, i) => 0.5 + 0.4 * Math.sin(i / 3)))
 		.map(v => Math.max(0, Math.min(1, v)));
 	const w = 600;
 	const h = 80;
 	const pad = 8;
 	const step = (w - pad * 2) / Math.max(1, data.length - 1);
+	// Downsampled series are uneven in time; place points by timestamp when given
+	const timed = !!times && times.length === data.length && data.length > 1 && times[times.length - 1] > times[0];
+	const t0 = timed ? times![0] : 0;
+	const tSpan = timed ? times![times!.length - 1] - t0 : 1;
 	const points = data.map((v, i) => {
-		const x = pad + i * step;
+		const x = timed ? pad + ((times![i] - t0) / tSpan) * (w - pad * 2) : pad + i * step;
 		const y = pad + (1 - v) * (h - pad * 2);
 		return `${x},${y}`;
 	}).join(" ");
@@ -17,4 +21,4 @@ export default function Sparkline({ values, color = "#22c55e" }: Props) {
 			<polyline fill="none" stroke={color} strokeWidth="2" points={points} />
 		</svg>
 	);
-} 
\ No newline at end of file
+}
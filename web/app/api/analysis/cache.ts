@@ -0,0 +1,105 @@
+import { createHash } from "crypto";
+import { promises as fs } from "fs";
+import os from "os";
+import path from "path";
+
+// Analysis text keyed by a hash of the feed fields the prompt is built from.
+// Entries live in memory and on disk, so a restarted server still skips the LLM
+// call for a feed it has already analyzed.
+const CACHE_DIR = process.env.ANALYSIS_CACHE_DIR || path.join(os.tmpdir(), "market-sentiment-analysis");
+const MAX_FILES = 64;
+
+const memory = new Map<string, string>();
+const inflight = new Map<string, Promise<string>>();
+
+// Keys that change on every run without changing what the analysis says
+const VOLATILE_KEYS = new Set(["timestamp", "updated_at", "weight"]);
+
+function canonical(value: any): any {
+	if (Array.isArray(value)) return value.map(canonical);
+	if (value && typeof value === "object") {
+		const out: Record<string, any> = {};
+		for (const k of Object.keys(value).sort()) {
+			if (!VOLATILE_KEYS.has(k)) out[k] = canonical(value[k]);
+		}
+		return out;
+	}
+	return value;
+}
+
+// The slice of the feed the analysis is about: summary (with market indicators) and top drivers
+export function analysisInput(feed: any) {
+	return canonical({
+		summary: feed?.summary ?? null,
+		drivers: {
+			positive: feed?.drivers?.positive ?? [],
+			negative: feed?.drivers?.negative ?? [],
+		},
+	});
+}
+
+export function analysisKey(input: any, variant: string): string {
+	return createHash("sha256").update(variant).update("\0").update(JSON.stringify(input)).digest("hex");
+}
+
+async function readEntry(key: string): Promise<string | null> {
+	try {
+		const data = JSON.parse(await fs.readFile(path.join(CACHE_DIR, `${key}.json`), "utf8"));
+		return typeof data?.analysis === "string" ? data.analysis : null;
+	} catch {
+		return null;
+	}
+}
+
+async function writeEntry(key: string, analysis: string): Promise<void> {
+	try {
+		await fs.mkdir(CACHE_DIR, { recursive: true });
+		const file = path.join(CACHE_DIR, `${key}.json`);
+		const tmp = `${file}.${process.pid}.tmp`;
+		await fs.writeFile(tmp, JSON.stringify({ analysis, created_at: new Date().toISOString() }));
+		await fs.rename(tmp, file);
+		await prune();
+	} catch (error) {
+		console.log("Analysis cache write failed:", error);
+	}
+}
+
+async function prune(): Promise<void> {
+	const names = (await fs.readdir(CACHE_DIR)).filter((n) => n.endsWith(".json"));
+	if (names.length <= MAX_FILES) return;
+	const stats = await Promise.all(
+		names.map(async (n) => ({ n, mtime: (await fs.stat(path.join(CACHE_DIR, n))).mtimeMs })),
+	);
+	stats.sort((a, b) => a.mtime - b.mtime);
+	await Promise.all(stats.slice(0, stats.length - MAX_FILES).map(({ n }) => fs.unlink(path.join(CACHE_DIR, n)).catch(() => {})));
+}
+
+// Cached analysis for key, generating it at most once at a time per key.
+// generate() returns null when the LLM is unavailable; the fallback is then
+// returned without being cached, so the next request tries again.
+export async function cachedAnalysis(key: string, generate: () => Promise<string | null>, fallback: string): Promise<string> {
+	const hit = memory.get(key);
+	if (hit !== undefined) return hit;
+	const pending = inflight.get(key);
+	if (pending) return pending;
+
+	const run = (async () => {
+		const stored = await readEntry(key);
+		if (stored !== null) {
+			memory.set(key, stored);
+			return stored;
+		}
+		const fresh = await generate();
+		if (fresh === null) return fallback;
+		memory.set(key, fresh);
+		if (memory.size > MAX_FILES) memory.delete(memory.keys().next().value as string);
+		await writeEntry(key, fresh);
+		return fresh;
+	})();
+	inflight.set(key, run);
+	try {
+		return await run;
+	} finally {
+		inflight.delete(key);
+	}
+}
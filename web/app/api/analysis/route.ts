@@ -1,7 +1,14 @@
 import { NextResponse } from "next/server";
+import { analysisInput, analysisKey, cachedAnalysis } from "./cache";
 
 export const revalidate = 43200; // 12 hours
 // export const revalidate = 14400; // 4 hours
+// The analysis cache lives on the filesystem
+export const runtime = "nodejs";
+
+const MODEL = "gpt-4o-mini";
+// Bump when the prompt changes so cached analyses are not reused
+const PROMPT_VERSION = 2;
 
 function clamp(n: number, lo = 0, hi = 1) {
 	return Math.max(lo, Math.min(hi, n));
@@ -25,7 +32,6 @@ async function fetchFeed(): Promise<any | null> {
 
 async function generateAnalysis(feed: any): Promise<string> {
 	const key = process.env.OPENAI_API_KEY;
-	const updatedAt = feed?.updated_at ?? null;
 	const s = feed?.summary ?? {};
 	const combined = typeof s?.combined_sentiment === "number" ? s.combined_sentiment : 0.5;
 	const crypto = typeof s?.crypto_sentiment === "number" ? s.crypto_sentiment : 0.5;
@@ -40,16 +46,24 @@ async function generateAnalysis(feed: any): Promise<string> {
 	console.log("OpenAI key present:", !!key);
 	if (!key) return fallback;
 
+	// Only summary, indicators and drivers go into the prompt; their hash keys the cache
+	const input = analysisInput(feed);
+	const cacheKey = analysisKey(input, `${MODEL}:${PROMPT_VERSION}:${process.env.OPENAI_BASE_URL ?? ""}`);
+	return cachedAnalysis(cacheKey, () => callModel(key, input), fallback);
+}
+
+async function callModel(key: string, input: any): Promise<string | null> {
 	const prompt = `You are a crypto markets analyst writing for a professional audience. Analyze this market sentiment data and provide insights in 2-3 sentences. Be conversational and insightful, not just reporting numbers. Focus on what the sentiment means for traders and investors.
 
-Data: ${JSON.stringify(feed).slice(0, 15000)}`;
+Data: ${JSON.stringify(input).slice(0, 15000)}`;
 
 	try {
 		console.log("Calling OpenAI...");
 		const { OpenAI } = await import("openai/index.mjs");
-		const openai = new OpenAI({ apiKey: key });
+		// OPENAI_BASE_URL points at a compatible endpoint, e.g. scripts/llm-standin.mjs
+		const openai = new OpenAI({ apiKey: key, baseURL: process.env.OPENAI_BASE_URL || undefined });
 		const resp = await openai.chat.completions.create({
-			model: "gpt-4o-mini",
+			model: MODEL,
 			messages: [
 				{ role: "system", content: "You are a witty, insightful crypto analyst who provides valuable market commentary. Be engaging and provide actionable insights." },
 				{ role: "user", content: prompt },
@@ -57,12 +71,12 @@ Data: ${JSON.stringify(feed).slice(0, 15000)}`;
 			max_tokens: 180,
 			temperature: 0.7,
 		});
-		const result = resp.choices?.[0]?.message?.content?.trim() || fallback;
-		console.log("OpenAI response received:", result.substring(0, 100) + "...");
+		const result = resp.choices?.[0]?.message?.content?.trim() || null;
+		console.log("OpenAI response received:", (result ?? "").substring(0, 100) + "...");
 		return result;
 	} catch (error) {
 		console.log("OpenAI error:", error);
-		return fallback;
+		return null;
 	}
 }
 
@@ -86,6 +100,7 @@ export async function GET() {
 		summary: feed?.summary ?? null,
 		drivers: feed?.drivers ?? { positive: [], negative: [] },
 		history: feed?.history ?? [],
+		series: feed?.series ?? null,
 	};
 
 	const res = NextResponse.json(body);
@@ -31,6 +31,10 @@ export default async function Page() {
 	const drivers = data?.drivers ?? { positive: [], negative: [] };
 	const marketIndicators = summary?.market_indicators;
 	const marketMovers = drivers?.market_movers;
+	// Precomputed 7d series (fixed point budget); older feeds only carry raw history
+	const trend = data?.series?.["7d"];
+	const trendValues: number[] = trend?.combined ?? (data?.history ?? []).map((e: any) => e.combined);
+	const trendTimes: number[] | undefined = trend?.t;
 
 	return (
 		<div>
@@ -53,6 +57,11 @@ export default async function Page() {
 				<span style={{ fontSize: 12, background: "#334155", color: "#cbd5e1", padding: "2px 8px", borderRadius: 6 }}>Using cached analysis</span>
 			</div>
 
+			<div style={{ marginTop: 18 }}>
+				<div style={{ fontSize: 14, marginBottom: 8, opacity: 0.8 }}>Combined sentiment, 7 days</div>
+				<Sparkline values={trendValues} times={trendTimes} />
+			</div>
+
 			<div style={{ marginTop: 18, padding: 12, background: "#0f172a", border: "1px solid #1f2937", borderRadius: 8 }}>
 				<div style={{ fontSize: 14, marginBottom: 8, opacity: 0.8 }}>📊 Data Quality</div>
 				<div style={{ display: "grid", gridTemplateColumns: "1fr 1fr 1fr", gap: 16, fontSize: 12 }}>
@@ -0,0 +1,48 @@
+// Local stand-in for the OpenAI chat completions API.
+//
+//   node scripts/llm-standin.mjs            # listens on 127.0.0.1:8788
+//   OPENAI_BASE_URL=http://127.0.0.1:8788/v1 OPENAI_API_KEY=test npm run dev
+//
+// Replies are derived from a hash of the request, so the same prompt always
+// gets the same text. GET /calls reports how many completions were served;
+// STANDIN_DELAY_MS slows each reply down to make concurrent requests overlap.
+import { createHash } from "crypto";
+import http from "http";
+
+const port = Number(process.env.STANDIN_PORT || 8788);
+const delay = Number(process.env.STANDIN_DELAY_MS || 0);
+let calls = 0;
+
+function send(res, status, body) {
+	const data = JSON.stringify(body);
+	res.writeHead(status, { "Content-Type": "application/json", "Content-Length": Buffer.byteLength(data) });
+	res.end(data);
+}
+
+const server = http.createServer((req, res) => {
+	if (req.method === "GET" && req.url === "/calls") return send(res, 200, { calls });
+	if (req.method !== "POST" || !req.url?.endsWith("/chat/completions")) return send(res, 404, { error: { message: "Not found" } });
+	let raw = "";
+	req.on("data", (chunk) => (raw += chunk));
+	req.on("end", () => {
+		let body;
+		try {
+			body = JSON.parse(raw);
+		} catch {
+			return send(res, 400, { error: { message: "Invalid JSON" } });
+		}
+		calls += 1;
+		const digest = createHash("sha256").update(raw).digest("hex").slice(0, 8);
+		const content = `Stand-in analysis ${digest}: sentiment is steady and drivers are mixed, so traders should watch for confirmation before adding risk.`;
+		setTimeout(() => send(res, 200, {
+			id: `chatcmpl-standin-${calls}`,
+			object: "chat.completion",
+			created: Math.floor(Date.now() / 1000),
+			model: body.model ?? "standin",
+			choices: [{ index: 0, message: { role: "assistant", content }, finish_reason: "stop" }],
+			usage: { prompt_tokens: Math.ceil(raw.length / 4), completion_tokens: 30, total_tokens: Math.ceil(raw.length / 4) + 30 },
+		}), delay);
+	});
+});
+
+server.listen(port, "127.0.0.1", () => console.log(`LLM stand-in on http://127.0.0.1:${port}/v1`));